@@ -0,0 +1,203 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from columnar import read_columnar, read_schema, write_columnar
+from data_preprocessing import load_processed_features, memory_footprint
+
+# Dimensions of the aggregate cube, one row per combination seen in the data
+CUBE_KEYS = ['OCC_YEAR', 'SEASON', 'HOUR_BUCKET', 'COST_BUCKET', 'HOOD_140']
+SOURCE_COLUMNS = ['OCC_YEAR', 'SEASON', 'OCC_HOUR', 'BIKE_COST', 'HOOD_140']
+
+SEASON_NAMES = {0: 'Fall', 1: 'Spring', 2: 'Summer', 3: 'Winter'}
+TIME_PERIODS = ['Morning (6AM-12PM)', 'Afternoon (12PM-6PM)', 'Evening (6PM-12AM)', 'Night (12AM-6AM)']
+COST_BINS = [0, 500, 1000, 2000, float('inf')]
+COST_RANGES = ['$0-500', '$501-1000', '$1001-2000', '$2000+']
+
+# Dashboard statistics only cover recent years
+MIN_YEAR = 2014
+
+
+def build_cube(df):
+    """Aggregate incidents into counts and cost sums per cube cell."""
+    hour = df['OCC_HOUR']
+    hour_bucket = np.select([(hour >= 6) & (hour < 12), (hour >= 12) & (hour < 18), (hour >= 18) & (hour < 24)],
+                            [0, 1, 2], default=3)
+
+    # Bikes without a positive cost are kept for the counts but get no cost bucket
+    cost = df['BIKE_COST'].astype('float64')
+    has_cost = cost.notna() & (cost > 0)
+    cost_bucket = np.full(len(df), -1)
+    cost_bucket[has_cost.to_numpy()] = pd.cut(cost[has_cost], bins=COST_BINS, labels=False)
+
+    cube = pd.DataFrame({
+        'OCC_YEAR': df['OCC_YEAR'].to_numpy(),
+        'SEASON': df['SEASON'].to_numpy(),
+        'HOUR_BUCKET': hour_bucket,
+        'COST_BUCKET': cost_bucket,
+        'HOOD_140': df['HOOD_140'].to_numpy(),
+        'COST': cost.where(has_cost, 0.0).to_numpy()
+    })
+    return cube.groupby(CUBE_KEYS, sort=False).agg(count=('COST', 'size'), cost_sum=('COST', 'sum')).reset_index()
+
+
+def _percentages(counts, total):
+    return (counts / total * 100).round(1)
+
+
+def thefts_over_time(cube):
+    theft_counts = cube.groupby('OCC_YEAR')['count'].sum().sort_index()
+    latest_year = theft_counts.index[-1]
+    first_year_thefts = theft_counts[MIN_YEAR]
+    growth_rate = ((theft_counts[latest_year] - first_year_thefts) / first_year_thefts) * 100
+    return {
+        'total_thefts': int(theft_counts.sum()),
+        'growth_rate': round(float(growth_rate), 1),
+        'latest_year': int(latest_year)
+    }
+
+
+def seasonal_analysis(cube):
+    seasonal_stats = cube.groupby('SEASON')['count'].sum().rename(index=SEASON_NAMES)
+    seasonal_stats = seasonal_stats[seasonal_stats.index.isin(SEASON_NAMES.values())]
+    seasonal_stats = seasonal_stats.sort_values(ascending=False, kind='stable')
+    seasonal_percentages = _percentages(seasonal_stats, cube['count'].sum())
+    peak_season = seasonal_stats.index[0]
+    return {
+        'peak_season': str(peak_season),
+        'peak_percentage': float(seasonal_percentages[peak_season]),
+        'seasonal_distribution': {
+            season: float(percentage)
+            for season, percentage in seasonal_percentages.items()
+        }
+    }
+
+
+def time_analysis(cube):
+    time_stats = cube.groupby('HOUR_BUCKET')['count'].sum().rename(index=dict(enumerate(TIME_PERIODS)))
+    time_stats = time_stats.sort_values(ascending=False, kind='stable')
+    time_percentages = _percentages(time_stats, cube['count'].sum())
+    return {
+        'peak_period': time_stats.index[0],
+        'peak_percentage': float(time_percentages[time_stats.index[0]]),
+        'safest_period': time_stats.index[-1],
+        'safest_percentage': float(time_percentages[time_stats.index[-1]])
+    }
+
+
+def value_analysis(cube):
+    priced = cube[cube['COST_BUCKET'] >= 0]
+    value_stats = priced.groupby('COST_BUCKET')['count'].sum().reindex(range(len(COST_RANGES)), fill_value=0)
+    value_stats = value_stats.rename(index=dict(enumerate(COST_RANGES))).sort_values(ascending=False, kind='stable')
+    total_bikes = priced['count'].sum()
+    value_percentages = _percentages(value_stats, total_bikes)
+    most_common_range = value_stats.index[0]
+    return {
+        'average_cost': round(float(priced['cost_sum'].sum() / total_bikes), 2),
+        'most_common_range': most_common_range,
+        'most_common_percentage': float(value_percentages[most_common_range])
+    }
+
+
+METRICS = {
+    'thefts_over_time': thefts_over_time,
+    'seasonal_analysis': seasonal_analysis,
+    'time_analysis': time_analysis,
+    'value_analysis': value_analysis
+}
+
+
+def file_signature(filepath):
+    """Modification time and size, used to notice when a data file changes."""
+    stat = os.stat(filepath)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class AnalyticsCube:
+    """Dashboard aggregates over processed_features.csv, rebuilt when the file changes.
+
+    The cube is built once per version of the file. Each dashboard metric is
+    computed from it on first use and then served from memory.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        # (file signature, cube, memoized metrics), swapped as one tuple
+        self._state = (None, None, {})
+
+    def _current(self):
+        signature = file_signature(self.filepath)
+        if signature != self._state[0]:
+            with self._lock:
+                if signature != self._state[0]:
+                    df = load_processed_features(self.filepath, SOURCE_COLUMNS)
+                    print(f"Loaded {len(df)} rows from {self.filepath} ({memory_footprint(df) / 1e6:.1f} MB)")
+                    cube = build_cube(df)
+                    cube = cube[cube['OCC_YEAR'] >= MIN_YEAR].reset_index(drop=True)
+                    self._state = (signature, cube, {})
+        return self._state
+
+    def cube(self):
+        """Return the aggregate cube for recent years, rebuilding it if the file changed."""
+        return self._current()[1]
+
+    def metric(self, name):
+        """Return a dashboard metric, computing it once per cube version."""
+        _, cube, metrics = self._current()
+        if name not in metrics:
+            metrics[name] = METRICS[name](cube)
+        return metrics[name]
+
+
+class ReturnRateStats:
+    """Recovery rates from the raw theft data, served from a typed columnar cache.
+
+    The first request converts the OCC_YEAR and STATUS columns of the raw CSV
+    into a columnar cache (small ints and a categorical). Later processes read
+    only those two columns from the cache. The rates are computed once and
+    shared read-only until the CSV changes.
+    """
+
+    COLUMNS = {'OCC_YEAR': 'int16', 'STATUS': 'category'}
+
+    def __init__(self, csv_path, cache_path):
+        self.csv_path = csv_path
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._state = (None, None)
+
+    def _load(self, signature):
+        source = list(signature)
+        if not os.path.exists(self.cache_path) or read_schema(self.cache_path)['metadata'].get('source') != source:
+            df = pd.read_csv(self.csv_path, usecols=list(self.COLUMNS), dtype={'STATUS': 'category'})
+            # Rows without a year never pass the MIN_YEAR filter
+            df = df.dropna(subset=['OCC_YEAR']).astype(self.COLUMNS)
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            write_columnar(self.cache_path, df, metadata={'source': source})
+        return read_columnar(self.cache_path, list(self.COLUMNS))
+
+    def metrics(self):
+        """Return the overall and yearly return rates since MIN_YEAR."""
+        signature = file_signature(self.csv_path)
+        if signature != self._state[0]:
+            with self._lock:
+                if signature != self._state[0]:
+                    self._state = (signature, self._compute(self._load(signature)))
+        return self._state[1]
+
+    @staticmethod
+    def _compute(df):
+        df = df[df['OCC_YEAR'] >= MIN_YEAR]
+        recovered = (df['STATUS'] == 'RECOVERED').to_numpy()
+        total_bikes = len(df)
+        recovered_bikes = int(recovered.sum())
+        yearly = pd.Series(recovered, index=df['OCC_YEAR'].to_numpy()).groupby(level=0).mean() * 100
+        return {
+            'total_bikes': total_bikes,
+            'total_recovered': recovered_bikes,
+            'return_rate': round(recovered_bikes / total_bikes * 100, 1) if total_bikes > 0 else 0,
+            'yearly_return_rate': {int(year): round(float(rate), 1) for year, rate in yearly.items()}
+        }
@@ -1,24 +1,33 @@
-import matplotlib
-matplotlib.use('Agg')  # Set the backend to Agg before importing pyplot
-import matplotlib.pyplot as plt
-import pandas as pd
-import joblib
+import time
+_import_start = time.perf_counter()
+
 import os
+import signal
 import sys
+import threading
 import json
-import io
-import base64
 import numpy as np
-from pathlib import Path
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, request
 from flask_restx import Api, Resource, fields
 from flask_cors import CORS
 
 
 # Add src directory to Python path
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'))
-from data_preprocessing import preprocess_features
-from rtree_search import RTree
+from lazy import Lazy, LazyModule, import_module, startup_report
+from model_store import ModelStore, process_memory
+from prediction_cache import PredictionCache
+from options_index import DYNAMIC_COMPRESSION, OptionsIndex, Payload
+from autocomplete import FIELDS as AUTOCOMPLETE_FIELDS, INDEX_PATH as AUTOCOMPLETE_PATH, AutocompleteIndex, \
+    CategoryNormalizer
+from coalescer import MicroBatcher, PredictionTimeoutError, QueueFullError
+from metrics import REGISTRY, span
+from instrumentation import instrument_app
+
+# pandas, preprocessing, the spatial index and the dashboard data are only
+# loaded by the first request that needs them, or all at once by preload()
+pd = LazyModule('pandas')
+preprocessing = LazyModule('data_preprocessing')
 
 app = Flask(__name__)
 
@@ -30,19 +39,22 @@ CORS(app, resources={
     }
 })
 
+# Per-endpoint latency histograms and /metrics; PROFILE_DIR enables the X-Profile header
+instrument_app(app, REGISTRY, profile_dir=os.environ.get('PROFILE_DIR'))
+
 api = Api(app, version='1.0', title='Bicycle Theft Prediction API',
           description='An API for predicting bicycle theft outcomes',
           doc='/docs')
-# Initialize R-tree search
-rtree = RTree()
-#declare processed data for global use
-#read 2 store data
-try:
-    processed_data = pd.read_csv('../data/processed_features.csv')
-except Exception as e:
-    processed_data = None
-    print(f"Failed to load data: {e}")
-
+# R-tree search over the neighbourhood polygons
+rtree = Lazy('rtree', lambda: import_module('rtree_search').RTree())
+# Dashboard aggregates, built on first use and rebuilt when the file changes
+data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+analytics = Lazy('analytics', lambda: import_module('analytics').AnalyticsCube(
+    os.path.join(data_dir, 'processed_features.csv')))
+# The processed features drop STATUS, so return rates come from the raw data
+return_rates = Lazy('return_rates', lambda: import_module('analytics').ReturnRateStats(
+    os.path.join(data_dir, 'Bicycle_Thefts_Data.csv'),
+    os.path.join(data_dir, 'cache', 'Bicycle_Thefts_Data.cols')))
 
 
 # Define the models for request/response
@@ -70,6 +82,20 @@ prediction_output = api.model('PredictionOutput', {
     'probability_stolen': fields.Float(description='Probability of remaining stolen')
 })
 
+batch_result = api.model('BatchPredictionResult', {
+    'index': fields.Integer(description='Position of the record in the request'),
+    'status': fields.String(description='Predicted status (RECOVERED or STOLEN)'),
+    'probability_recovered': fields.Float(description='Probability of recovery'),
+    'probability_stolen': fields.Float(description='Probability of remaining stolen'),
+    'error': fields.String(description='Validation error for this record, if any')
+})
+
+batch_output = api.model('BatchPredictionOutput', {
+    'total': fields.Integer(description='Number of records received'),
+    'failed': fields.Integer(description='Number of records that could not be scored'),
+    'results': fields.List(fields.Nested(batch_result))
+})
+
 neighbourhood_input = api.model('NeighbourhoodInput', {
     'latitude': fields.Float(required=True, description='Latitude of the location', example=43.693449),
     'longitude': fields.Float(required=True, description='Longitude of the location', example=-79.433288)
@@ -86,27 +112,207 @@ error_output = api.model('ErrorOutput', {
 
 # Load unique values
 unique_values_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'unique_values.json')
-with open(unique_values_path, 'r') as f:
-    unique_values = json.load(f)
 
-# Load model and feature order
+def load_unique_values():
+    with open(unique_values_path, 'r') as f:
+        return json.load(f)
+
+# Serialized, compressed and indexed once, /options serves the stored bytes
+options_index = Lazy('options', lambda: OptionsIndex(load_unique_values()))
+
+# Most values a prefix query on /options returns
+MAX_OPTIONS_LIMIT = 1000
+
+def load_autocomplete():
+    if not os.path.exists(AUTOCOMPLETE_PATH):
+        print("Warning: Autocomplete index not found. Run build_autocomplete.py in data/ to build it.")
+        return None
+    return AutocompleteIndex.load(AUTOCOMPLETE_PATH)
+
+# Make/model suggestions, built offline by data/build_autocomplete.py
+autocomplete_index = Lazy('autocomplete', load_autocomplete)
+
+# Map typed makes and models to the served model's categories before scoring
+NORMALIZE_INPUTS = os.environ.get('NORMALIZE_INPUTS', '1').lower() not in ('0', 'false', 'no')
+# Normalizer of the vocabulary currently served, rebuilt when a reload brings a new one
+category_normalizer = None
+
+def category_normalizer_for(vocabulary):
+    """The normalizer of vocabulary, or None when normalization is off."""
+    global category_normalizer
+    if not NORMALIZE_INPUTS or vocabulary is None:
+        return None
+    normalizer = category_normalizer
+    if normalizer is None or normalizer.vocabulary is not vocabulary:
+        normalizer = category_normalizer = CategoryNormalizer(vocabulary, autocomplete_index.get())
+    return normalizer
+
+# Model, feature order and vocabulary, loaded on the first prediction
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-model_path = os.path.join(base_dir, 'models', 'best_model.pkl')
-feature_order_path = os.path.join(base_dir, 'models', 'feature_order.pkl')
+models_dir = os.path.join(base_dir, 'models')
 
 # Ensure models directory exists
-models_dir = os.path.dirname(model_path)
 if not os.path.exists(models_dir):
     os.makedirs(models_dir)
 
-# Load model and feature order if they exist
-if os.path.exists(model_path) and os.path.exists(feature_order_path):
-    model = joblib.load(model_path)
-    feature_order = joblib.load(feature_order_path)
-else:
+# The flattened tree ensemble gives the same probabilities without sklearn's per-call overhead,
+# and is memory-mapped so worker processes share one copy of it
+use_tree_engine = os.environ.get('USE_TREE_ENGINE', '1').lower() not in ('0', 'false', 'no')
+# How often each worker checks the registry's live version, 0 turns the check off
+MODEL_CHECK_INTERVAL = float(os.environ.get('MODEL_CHECK_INTERVAL', 5))
+model_store = ModelStore(models_dir, use_tree_engine=use_tree_engine,
+                         check_interval=MODEL_CHECK_INTERVAL if MODEL_CHECK_INTERVAL > 0 else None)
+if not model_store.available():
     print("Warning: Model files not found. Please train the model first.")
-    model = None
-    feature_order = None
+
+# Load eagerly instead, e.g. before a worker starts accepting requests
+if os.environ.get('MODEL_WARMUP', '').lower() in ('1', 'true', 'yes'):
+    model_store.warmup()
+
+# Probabilities of recently seen feature rows, 0 entries disables the cache
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 10000))
+if PREDICTION_CACHE_SIZE > 0:
+    ttl = os.environ.get('PREDICTION_CACHE_TTL')
+    prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, float(ttl) if ttl else None)
+else:
+    prediction_cache = None
+
+def predict_proba(model, X):
+    """Score a feature matrix, through the prediction cache when it is enabled."""
+    if prediction_cache is not None:
+        return prediction_cache.predict_proba(model, X)
+    return model.predict_proba(X)
+
+def reload_model():
+    """Swap in the live registry version and re-read the field options."""
+    info = model_store.reload()
+    options_index.reset()
+    options_index.get()
+    print(f"Reloaded model version {info['version']} from {info['artifact']}")
+    return info
+
+def _reload_on_signal(signum, frame):
+    # Only flag it: the handler may interrupt a thread holding the store's lock, so the
+    # load itself happens on the next request
+    model_store.request_reload()
+
+# kill -HUP <worker pid> reloads on its next request (signals can only be set from the main thread)
+if hasattr(signal, 'SIGHUP') and threading.current_thread() is threading.main_thread():
+    signal.signal(signal.SIGHUP, _reload_on_signal)
+
+# Shared secret for the /admin endpoints, disabled when unset
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Upper bound on records accepted by /predict/batch in one request
+MAX_BATCH_RECORDS = int(os.environ.get('MAX_BATCH_RECORDS', 50000))
+# Bodies larger than this are rejected before they are read, about 1 KB per record by default
+MAX_BATCH_BYTES = int(os.environ.get('MAX_BATCH_BYTES', MAX_BATCH_RECORDS * 1024))
+
+class BatchTooLargeError(Exception):
+    """Raised when a batch request is over MAX_BATCH_BYTES or MAX_BATCH_RECORDS."""
+
+def read_batch_records():
+    """Read the records of a batch request from a JSON body or NDJSON lines.
+
+    Returns the records and a dict of index -> error for entries that could
+    not be parsed, so one bad line does not reject the whole batch. Raises
+    BatchTooLargeError before parsing when the body is over MAX_BATCH_BYTES
+    or has more than MAX_BATCH_RECORDS lines.
+    """
+    if request.content_length is not None and request.content_length > MAX_BATCH_BYTES:
+        raise BatchTooLargeError(f"Request body exceeds the limit of {MAX_BATCH_BYTES} bytes")
+
+    records, errors = [], {}
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        lines = [line for line in request.get_data().splitlines() if line.strip()]
+        if len(lines) > MAX_BATCH_RECORDS:
+            raise BatchTooLargeError(f"Batch exceeds the limit of {MAX_BATCH_RECORDS} records")
+        for i, line in enumerate(lines):
+            try:
+                records.append(json.loads(line))
+            except ValueError as e:
+                records.append(None)
+                errors[i] = f"Invalid JSON: {e}"
+    else:
+        payload = request.get_json(force=True)
+        records = payload.get('records') if isinstance(payload, dict) else payload
+        if not isinstance(records, list):
+            raise ValueError("Expected a JSON list of records or an object with a 'records' list")
+        if len(records) > MAX_BATCH_RECORDS:
+            raise BatchTooLargeError(f"Batch exceeds the limit of {MAX_BATCH_RECORDS} records")
+
+    for i, record in enumerate(records):
+        if not isinstance(record, dict) and i not in errors:
+            errors[i] = "Record must be a JSON object"
+    return records, errors
+
+def validate_frame(df):
+    """Split raw records into the rows preprocess_features can take and the rest.
+
+    Returns the valid rows, with every optional column present and
+    OCC_HOUR/OCC_DOY numeric, and a dict of index -> error for the others.
+    """
+    for col in preprocessing.OPTIONAL_FIELDS:
+        if col not in df.columns:
+            df[col] = np.nan
+    problems = preprocessing.validate_records(df)
+    df = df[problems.isna()].copy()
+    for col in ['OCC_HOUR', 'OCC_DOY']:
+        df[col] = pd.to_numeric(df[col])
+    return df, problems.dropna().to_dict()
+
+def predict_records(records, errors=None):
+    """Score many raw records with one preprocessing pass and one model call.
+
+    Returns one result dict per record, in input order. Records that fail
+    validation get an 'error' entry instead of a prediction.
+    """
+    model, feature_order, vocabulary = model_store.get()
+    errors = dict(errors or {})
+    valid = [i for i, record in enumerate(records) if i not in errors]
+    df = pd.DataFrame.from_records([records[i] for i in valid], index=valid)
+    normalizer = category_normalizer_for(vocabulary)
+    if normalizer is not None:
+        with span('batch.normalize'):
+            normalizer.normalize_frame(df)
+
+    if len(df):
+        with span('batch.validate'):
+            df, problems = validate_frame(df)
+            errors.update(problems)
+
+    results = [{'index': i, 'error': errors[i]} if i in errors else None for i in range(len(records))]
+    if len(df):
+        with span('batch.preprocess'):
+            X = preprocessing.preprocess_features(df, vocabulary)
+        with span('batch.reorder'):
+            X = X[feature_order]
+        with span('batch.predict_proba'):
+            probability = predict_proba(model, X)
+        recovered = probability.argmax(axis=1) == 1
+        for i, is_recovered, (p_stolen, p_recovered) in zip(df.index, recovered, probability.tolist()):
+            results[i] = {
+                'index': i,
+                'status': 'RECOVERED' if is_recovered else 'STOLEN',
+                'probability_recovered': round(p_recovered, 2),
+                'probability_stolen': round(p_stolen, 2)
+            }
+    return results
+
+# Opt-in micro-batching of concurrent /predict calls
+if os.environ.get('PREDICT_COALESCE', '').lower() in ('1', 'true', 'yes'):
+    batcher = MicroBatcher(
+        predict_records,
+        max_batch_size=int(os.environ.get('PREDICT_BATCH_MAX_SIZE', 64)),
+        max_wait_ms=float(os.environ.get('PREDICT_BATCH_MAX_WAIT_MS', 2)),
+        max_queue_depth=int(os.environ.get('PREDICT_QUEUE_DEPTH', 1024)),
+        score_budget_ms=float(os.environ.get('PREDICT_SCORE_BUDGET_MS', 5000))
+    )
+    REGISTRY.register('predict_coalescer_queue_wait_seconds', 'Time /predict records wait to be batched',
+                      batcher.queue_wait)
+    REGISTRY.register('predict_coalescer_batch_size', 'Records per coalesced batch', batcher.batch_size)
+else:
+    batcher = None
 
 # Define namespaces
 ns = api.namespace('', description='Prediction operations')
@@ -130,19 +336,43 @@ class PredictTheft(Resource):
 
         Returns the probability of a bicycle being recovered or remaining stolen based on the input features.
         """
+        model, feature_order, vocabulary = model_store.get()
         if model is None or feature_order is None:
             return {'error': "Model not loaded. Please train the model first."}, 503
 
-        try:
-            data = api.payload
-            df = pd.DataFrame([data])
-            X = preprocess_features(df)
-            X = X[feature_order]
+        if not isinstance(api.payload, dict):
+            return {'error': "Record must be a JSON object"}, 400
 
-            prediction = model.predict(X)[0]
-            probability = model.predict_proba(X)[0]
+        if batcher is not None:
+            try:
+                result = batcher.submit(api.payload)
+            except (QueueFullError, PredictionTimeoutError) as e:
+                return {'error': str(e)}, 503
+            except Exception as e:
+                return {'error': str(e)}, 400
+            if 'error' in result:
+                return {'error': result['error']}, 400
+            return {key: value for key, value in result.items() if key != 'index'}
 
-            status = 'RECOVERED' if prediction == 1 else 'STOLEN'
+        try:
+            with span('predict.parse_json'):
+                data = api.payload
+            normalizer = category_normalizer_for(vocabulary)
+            if normalizer is not None:
+                with span('predict.normalize'):
+                    data = normalizer.normalize_record(data)
+            with span('predict.validate'):
+                df, problems = validate_frame(pd.DataFrame([data]))
+            if problems:
+                return {'error': problems[0]}, 400
+            with span('predict.preprocess'):
+                X = preprocessing.preprocess_features(df, vocabulary)
+            with span('predict.reorder'):
+                X = X[feature_order]
+            with span('predict.predict_proba'):
+                probability = predict_proba(model, X)[0]
+
+            status = 'RECOVERED' if probability.argmax() == 1 else 'STOLEN'
             prob_recovered = float(probability[1])
 
             return {
@@ -153,6 +383,89 @@ class PredictTheft(Resource):
         except Exception as e:
             return {'error': str(e)}, 400
 
+@ns.route('/predict/batch')
+class PredictTheftBatch(Resource):
+    @api.expect([prediction_input])
+    @api.response(200, 'Success', batch_output)
+    @api.response(400, 'Malformed Request', error_output)
+    @api.response(413, 'Too Many Records', error_output)
+    @api.response(503, 'Model Not Available', error_output)
+    def post(self):
+        """Predict bicycle theft outcomes for many records at once
+
+        Accepts a JSON list of records (or {"records": [...]}), or one JSON record per line
+        with Content-Type application/x-ndjson. Invalid records are reported individually.
+        """
+        if not model_store.available():
+            return {'error': "Model not loaded. Please train the model first."}, 503
+
+        try:
+            with span('batch.parse'):
+                records, errors = read_batch_records()
+        except BatchTooLargeError as e:
+            return {'error': str(e)}, 413
+        except Exception as e:
+            return {'error': str(e)}, 400
+
+        try:
+            results = predict_records(records, errors)
+        except Exception as e:
+            return {'error': str(e)}, 400
+        return {
+            'total': len(results),
+            'failed': sum('error' in result for result in results),
+            'results': results
+        }
+
+@ns.route('/predict/coalescer')
+class PredictCoalescer(Resource):
+    @api.response(200, 'Success')
+    @api.response(404, 'Coalescing Disabled', error_output)
+    def get(self):
+        """Report micro-batching settings, queue-wait and batch-size histograms"""
+        if batcher is None:
+            return {'error': "Request coalescing is disabled. Set PREDICT_COALESCE=1 to enable it."}, 404
+        return batcher.stats()
+
+@ns.route('/predict/cache')
+class PredictCache(Resource):
+    @api.response(200, 'Success')
+    @api.response(404, 'Cache Disabled', error_output)
+    def get(self):
+        """Report prediction cache hits, misses, evictions and size"""
+        if prediction_cache is None:
+            return {'error': "The prediction cache is disabled. Set PREDICTION_CACHE_SIZE above 0 to enable it."}, 404
+        return prediction_cache.stats()
+
+@ns.route('/diagnostics')
+class Diagnostics(Resource):
+    @api.response(200, 'Success')
+    def get(self):
+        """Report this worker's resident memory, how the model was loaded and startup timings"""
+        return {
+            'pid': os.getpid(),
+            'memory': process_memory(),
+            'model': model_store.info(),
+            'startup': dict(startup_report(), app_import_seconds=APP_IMPORT_SECONDS)
+        }
+
+@ns.route('/admin/reload')
+class AdminReload(Resource):
+    @api.response(200, 'Success')
+    @api.response(403, 'Forbidden', error_output)
+    @api.response(500, 'Reload Failed', error_output)
+    def post(self):
+        """Load the live model version from the registry without restarting
+
+        Requires the X-Admin-Token header to match the ADMIN_TOKEN environment variable.
+        """
+        if not ADMIN_TOKEN or request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+            return {'error': "Admin token missing or invalid"}, 403
+        try:
+            return reload_model()
+        except Exception as e:
+            return {'error': str(e)}, 500
+
 @ns.route('/neighbourhood')
 class Neighbourhood(Resource):
     @api.expect(neighbourhood_input)
@@ -165,7 +478,7 @@ class Neighbourhood(Resource):
             lon = api.payload['longitude']
 
             # Call the R-tree search function here
-            h140, n140 = rtree.search(lat, lon)
+            h140, n140 = rtree.get().search(lat, lon)
 
             return {
                 'HOOD_140': h140,
@@ -174,16 +487,83 @@ class Neighbourhood(Resource):
         except Exception as e:
             return {'error': str(e)}, 400
 
+def send_payload(payload):
+    """Serve a pre-serialized Payload, compressed if the client accepts it, or 304 if it has it."""
+    encoding, body = payload.select(request.accept_encodings)
+    headers = {'ETag': payload.etags[encoding], 'Vary': 'Accept-Encoding', 'Cache-Control': 'no-cache'}
+    if payload.matches(request.headers.get('If-None-Match')):
+        return Response(status=304, headers=headers)
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return Response(body, content_type='application/json', headers=headers)
+
 @ns.route('/options')
 class Options(Resource):
-    @api.doc(responses={200: 'Success', 500: 'Internal Server Error'})
+    @api.doc(params={
+        'field': 'Only return the options of this field, e.g. BIKE_MODEL',
+        'prefix': 'Only return values starting with this prefix (case-insensitive), requires field',
+        'limit': f'Most values returned for a prefix query (default 50, at most {MAX_OPTIONS_LIMIT})'
+    }, responses={200: 'Success', 304: 'Not Modified', 400: 'Invalid Query', 500: 'Internal Server Error'})
     def get(self):
-        """Get all available options for each field in the prediction input"""
+        """Get all available options for each field in the prediction input
+
+        Responses carry an ETag, so clients can revalidate with If-None-Match and get a 304.
+        """
         try:
-            return unique_values
+            index = options_index.get()
         except Exception as e:
             return {'error': str(e)}, 500
 
+        field = request.args.get('field')
+        prefix = request.args.get('prefix')
+        if field is None:
+            if prefix is not None:
+                return {'error': "The prefix parameter requires a field"}, 400
+            return send_payload(index.payload)
+        if field not in index.options:
+            return {'error': f"Unknown field {field}. Expected one of: {', '.join(index.options)}"}, 400
+        if prefix is None:
+            return send_payload(index.field_payloads[field])
+
+        try:
+            limit = int(request.args.get('limit', 50))
+        except ValueError:
+            return {'error': "limit must be an integer"}, 400
+        if not 0 < limit <= MAX_OPTIONS_LIMIT:
+            return {'error': f"limit must be between 1 and {MAX_OPTIONS_LIMIT}"}, 400
+        return send_payload(Payload({field: index.search(field, prefix, limit)}, DYNAMIC_COMPRESSION))
+
+@ns.route('/autocomplete')
+class Autocomplete(Resource):
+    @api.doc(params={
+        'field': f"Field to complete, one of {', '.join(AUTOCOMPLETE_FIELDS)}",
+        'q': 'What the user typed so far',
+        'limit': 'Most suggestions returned (default 10, at most 50)'
+    }, responses={200: 'Success', 400: 'Invalid Query', 503: 'Index Not Built'})
+    def get(self):
+        """Suggest bike makes or models for a partial or misspelled input
+
+        Prefix matches come first, most frequent in the training data first, followed by
+        typo-tolerant matches ranked by trigram similarity.
+        """
+        field = request.args.get('field')
+        if field not in AUTOCOMPLETE_FIELDS:
+            return {'error': f"field must be one of: {', '.join(AUTOCOMPLETE_FIELDS)}"}, 400
+        try:
+            limit = int(request.args.get('limit', 10))
+        except ValueError:
+            return {'error': "limit must be an integer"}, 400
+        if not 0 < limit <= 50:
+            return {'error': "limit must be between 1 and 50"}, 400
+
+        index = autocomplete_index.get()
+        if index is None:
+            return {'error': "Autocomplete index not built. Run build_autocomplete.py in data/."}, 503
+        query = request.args.get('q', '')
+        with span('autocomplete.suggest'):
+            results = index.suggest(field, query, limit)
+        return {'field': field, 'query': query, 'results': results}
+
 @app.route('/test', methods=['GET'])
 def test_endpoint():
     return jsonify({
@@ -194,353 +574,95 @@ def test_endpoint():
 @app.route('/api/thefts-over-time', methods=['GET'])
 def thefts_over_time():
     try:
-        # Load  data
-        df = processed_data
-        df = df[df['OCC_YEAR'] >= 2014]
-        
-        # Calculate metrics
-        theft_counts = df['OCC_YEAR'].value_counts().sort_index()
-        
-        # Calculate total thefts
-        total_thefts = len(df)
-        
-        # Calculate growth rate from 2014 to latest year
-        latest_year = theft_counts.index[-1]
-        latest_year_thefts = theft_counts[latest_year]
-        first_year_thefts = theft_counts[2014]  # Base year 2014
-        growth_rate = ((latest_year_thefts - first_year_thefts) / first_year_thefts) * 100
-        
-        # Create the plot with improved styling
-    #    plt.style.use('seaborn-v0_8-dark')
-     #   plt.figure(figsize=(12, 6))
-      #  plt.xticks(fontsize=18)
-    #    plt.yticks(fontsize=18)
-        
-        # Create the plot
-    #    ax = theft_counts.plot(kind='bar', color='#3498db')
-        
-        # Customize the plot
-    #    plt.title('Number of Bicycle Thefts by Year', fontsize=38, pad=20)
-    #    plt.xlabel('Year', fontsize=32)
-    #    plt.ylabel('Number of Thefts', fontsize=32)
-        
-        # Add value labels on top of each bar
-    #    for i, v in enumerate(theft_counts):
-    #        ax.text(i, v, str(v), ha='center', va='bottom')
-        
-        # Adjust layout to prevent label cutoff
-     #   plt.tight_layout()
-        
-        # Save plot to bytes buffer
-    #    buffer = io.BytesIO()
-     #   plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-    #    buffer.seek(0)
-    #    plt.close()
-        
-        # Encode the image
-     #   image_base64 = base64.b64encode(buffer.getvalue()).decode()
-
-        df = df.to_json()
-        return jsonify({
-            # 'image': image_base64,
-            'metrics': {
-                'total_thefts': total_thefts,
-                'growth_rate': round(growth_rate, 1),
-                'latest_year': int(latest_year)
-            }
-        })
+        return jsonify({'metrics': analytics.get().metric('thefts_over_time')})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/return-rate', methods=['GET'])
 def return_rate():
     try:
-        #The Proccessed data file removed status column showing if bikes were recovered.
-        #so og one for now,
-        df = pd.read_csv('../data/Bicycle_Thefts_Data.csv')
-        df = df[df['OCC_YEAR'] >= 2014]
-
-        # Calculate metrics
-        total_bikes = len(df)
-        recovered_bikes = len(df[df['STATUS'] == 'RECOVERED'])
-        return_rate = (recovered_bikes / total_bikes) * 100 if total_bikes > 0 else 0
-        
-        # Calculate return rate by year
-        yearly_stats = df.groupby('OCC_YEAR').agg({
-            'STATUS': lambda x: (x == 'RECOVERED').mean() * 100 if len(x) > 0 else 0
-        }).round(1)
-
-        # Create the plot
-    #    plt.style.use('seaborn-v0_8-dark')
-    #    plt.figure(figsize=(12, 6))
-    #    plt.xticks(fontsize=18)
-    #    plt.yticks(fontsize=18)
-        
-        # Create the plot
-     #   ax = yearly_stats.plot(kind='bar', color='#2ecc71', legend=False)
-        
-        # Customize the plot
-    #    plt.title('Bicycle Return Rate by Year', fontsize=36, pad=20)
-    #    plt.xlabel('Year', fontsize=24)
-     #   plt.ylabel('Return Rate (%)', fontsize=24)
-        
-        # Add value labels on top of each bar
-    #    for i, v in enumerate(yearly_stats['STATUS']):
-    #        ax.text(i, v, f'{v:.1f}%', ha='center', va='bottom')
-        
-    #    plt.tight_layout()
-        
-        # Save plot to bytes buffer
-    #    buffer = io.BytesIO()
-    #    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-    #    buffer.seek(0)
-    #    plt.close()
-        
-        # Encode the image
-      #  image_base64 = base64.b64encode(buffer.getvalue()).decode()
-
-        return jsonify({
-            # 'image': image_base64,
-            'metrics': {
-                'total_bikes': int(total_bikes),
-                'total_recovered': int(recovered_bikes),
-                'return_rate': round(return_rate, 1),
-            }
-        })
+        return jsonify({'metrics': return_rates.get().metrics()})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/seasonal-analysis', methods=['GET'])
 def seasonal_analysis():
     try:
-        # Load data
-        df = processed_data
-        df = df[df['OCC_YEAR'] >= 2014]
-
-        #map seasons to show names, on the graph  instead of, 0,1,2,3
-        season_mapping = {0: 'Fall', 1: 'Spring', 2: 'Summer', 3: 'Winter'}
-        df['SEASON'] = df['SEASON'].map(season_mapping)
-
-        # Calculate seasonal statistics
-        seasonal_stats = df['SEASON'].value_counts()
-        total_thefts = len(df)
-        seasonal_percentages = (seasonal_stats / total_thefts * 100).round(1)
-        
-        # Find the season with highest thefts
-        peak_season = seasonal_stats.index[0]
-        peak_season_percentage = seasonal_percentages[peak_season]
-        
-        # Create the plot
-        plt.style.use('seaborn-v0_8-dark')
-        plt.figure(figsize=(12, 6))
-        
-        # Create bar plot
-    #    colors = ['#3498db', '#e74c3c', '#2ecc71', '#f1c40f']
-    #    ax = seasonal_stats.plot(kind='bar', color=colors)
-        
-        # Set y-axis limit to 20,000
-   #     plt.ylim(0, 20000)
-        
-        # Customize the plot
-     #   plt.title('Bicycle Thefts by Season', fontsize=36, pad=20)
-     #   plt.xlabel('Season', fontsize=24)
-     #   plt.ylabel('Number of Thefts', fontsize=24)
-     #   plt.xticks(fontsize=18)
-     #   plt.yticks(fontsize=18)
-        
-        # Add value labels on top of each bar
-     #   for i, v in enumerate(seasonal_stats):
-     #       percentage = seasonal_percentages[seasonal_stats.index[i]]
-     #       ax.text(i, v, f'{v}\n({percentage}%)', 
-     #              ha='center', va='bottom', fontsize=12)
-        
-      #  plt.tight_layout()
-        
-        # Save plot to bytes buffer
-   #     buffer = io.BytesIO()
-   #     plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-   #     buffer.seek(0)
-   #     plt.close()
-        
-        # Encode the image
-    #    image_base64 = base64.b64encode(buffer.getvalue()).decode()
-
-        df = df.to_json()
-        return jsonify({
-            # 'image': image_base64,
-            'metrics': {
-                'peak_season': str(peak_season),
-                'peak_percentage': float(peak_season_percentage),
-                'seasonal_distribution': {
-                    season: float(percentage) 
-                    for season, percentage in seasonal_percentages.items()
-                }
-            }
-        })
+        return jsonify({'metrics': analytics.get().metric('seasonal_analysis')})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-##notfinished
+
 @app.route('/api/time-analysis', methods=['GET'])
 def time_analysis():
     try:
-        # Load  data
-        df = processed_data
-        df = df[df['OCC_YEAR'] >= 2014]
-        
-        # Group hours into periods
-        time_periods = {
-            'Morning (6AM-12PM)': (6, 12),
-            'Afternoon (12PM-6PM)': (12, 18),
-            'Evening (6PM-12AM)': (18, 24),
-            'Night (12AM-6AM)': (0, 6)
-        }
-        
-        # Create time period column
-        def get_time_period(hour):
-            for period, (start, end) in time_periods.items():
-                if start <= hour < end:
-                    return period
-            return 'Night (12AM-6AM)'
-        
-        df['TimePeriod'] = df['OCC_HOUR'].apply(get_time_period)
-        
-        # Calculate statistics
-        time_stats = df['TimePeriod'].value_counts()
-        total_thefts = len(df)
-        time_percentages = (time_stats / total_thefts * 100).round(1)
-        
-        # Find peak time period
-        peak_period = time_stats.index[0]
-        peak_percentage = time_percentages[peak_period]
-        
-        # Create the plot
-   #     plt.style.use('seaborn-v0_8-dark')
-    #    plt.figure(figsize=(12, 6))
-        
-        # Create bar plot with custom colors
-      #  colors = ['#f39c12', '#e74c3c', '#9b59b6', '#2c3e50']
-     #   ax = time_stats.plot(kind='bar', color=colors, legend=False)
-        
-        # Customize the plot
-     #   plt.title('Bicycle Thefts by Time of Day', fontsize=36, pad=20)
-     #   plt.xlabel('Time Period', fontsize=24)
-     #   plt.ylabel('Number of Thefts', fontsize=24)
-     #   plt.xticks(fontsize=18, rotation=45)
-     #   plt.yticks(fontsize=18)
-        
-        # Add value labels on top of each bar
-     #   for i, v in enumerate(time_stats):
-     #       percentage = time_percentages[time_stats.index[i]]
-      #      ax.text(i, v, f'{v}\n({percentage}%)', 
-      #             ha='center', va='bottom', fontsize=12)
-        
-        plt.tight_layout()
-        
-        # Save plot to bytes buffer
-     #   buffer = io.BytesIO()
-    #    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-     #   buffer.seek(0)
-     #   plt.close()
-        
-        # Encode the image
-    #    image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        df = df.to_json()
-        return jsonify({
-            # 'image': image_base64,
-            'metrics': {
-                'peak_period': peak_period,
-                'peak_percentage': float(peak_percentage),
-                'safest_period': time_stats.index[-1],
-                'safest_percentage': float(time_percentages[time_stats.index[-1]])
-            }
-        })
+        return jsonify({'metrics': analytics.get().metric('time_analysis')})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-##notfinished
+
 @app.route('/api/value-analysis', methods=['GET'])
 def value_analysis():
     try:
-        # Load  data
-        df = processed_data
-        df = df[df['OCC_YEAR'] >= 2014]
-        
-        # Remove any null values and outliers
-        df = df[df['BIKE_COST'].notna()]
-        df = df[df['BIKE_COST'] > 0]
-        
-        # Create cost ranges
-        bins = [0, 500, 1000, 2000, float('inf')]
-        labels = ['$0-500', '$501-1000', '$1001-2000', '$2000+']
-        df['Cost_Range'] = pd.cut(df['BIKE_COST'], bins=bins, labels=labels)
-        
-        # Calculate statistics
-        value_stats = df['Cost_Range'].value_counts()
-        total_bikes = len(df)
-        value_percentages = (value_stats / total_bikes * 100).round(1)
-        
-        # Calculate average cost and most common range
-        avg_cost = df['BIKE_COST'].mean()
-        most_common_range = value_stats.index[0]
-        most_common_percentage = value_percentages[most_common_range]
-        
-        # Create the plot
-  #      plt.style.use('seaborn-v0_8-dark')
-  #      plt.figure(figsize=(12, 6))
-        
-        # Create bar plot with custom colors
-   #     colors = ['#3498db', '#2ecc71', '#e74c3c', '#f1c40f']
-   #     ax = value_stats.plot(kind='bar', color=colors, legend=False)
-        
-        # Customize the plot
-    #    plt.title('Bicycle Thefts by Value Range', fontsize=36, pad=20)
-   #     plt.xlabel('Value Range', fontsize=24)
-    #    plt.ylabel('Number of Thefts', fontsize=24)
-   #     plt.xticks(fontsize=18, rotation=45)
-   #     plt.yticks(fontsize=18)
-        
-        # Add value labels on top of each bar
-    #    for i, v in enumerate(value_stats):
-    #        percentage = value_percentages[value_stats.index[i]]
-    #        ax.text(i, v, f'{v}\n({percentage}%)', 
-    #               ha='center', va='bottom', fontsize=12)
-        
-    #    plt.tight_layout()
-        
-        # Save plot to bytes buffer
-    #    buffer = io.BytesIO()
-    #    plt.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-    #    buffer.seek(0)
-    #    plt.close()
-        
-        # Encode the image
-        #image_base64 = base64.b64encode(buffer.getvalue()).decode()
-        df = df.to_json()
-        return jsonify({
-            # 'image': image_base64,
-            'metrics': {
-                'average_cost': round(avg_cost, 2),
-                'most_common_range': most_common_range,
-                'most_common_percentage': float(most_common_percentage)
-            }
-        })
+        return jsonify({'metrics': analytics.get().metric('value_analysis')})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route("/api/model-metrics", methods=["GET"])
 def model_metrics():
-    model_name = "random_forest"
     try:
-        metrics_path = "../models/" + model_name + "_metrics.json"
-        if not os.path.exists(metrics_path):
-            return jsonify({"error": "Model metrics not found"}), 404
-
-        with open(metrics_path, "r") as f:
-            metrics = json.load(f)
+        # Metrics of the version actually being served
+        model_store.get()
+        metrics = model_store.metrics()
+        if metrics is None:
+            # Models trained before the registry only have the notebook metrics
+            metrics_path = os.path.join(models_dir, "random_forest_metrics.json")
+            if not os.path.exists(metrics_path):
+                return jsonify({"error": "Model metrics not found"}), 404
+            with open(metrics_path, "r") as f:
+                metrics = json.load(f)
 
         return jsonify(metrics)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Modules the endpoints import on first use, heaviest first
+PRELOAD_MODULES = ['pandas', 'data_preprocessing', 'rtree_search', 'analytics']
+
+def preload():
+    """Import and build everything the endpoints otherwise load on first use.
+
+    Each step is timed; a step that fails (e.g. missing data files) is
+    reported and skipped, and the endpoints relying on it will retry on use.
+    """
+    steps = [(f'import {name}', lambda name=name: import_module(name)) for name in PRELOAD_MODULES] + [
+        ('options', options_index.get),
+        ('autocomplete', autocomplete_index.get),
+        ('rtree', rtree.get),
+        ('analytics', lambda: analytics.get().cube()),
+        ('return_rates', lambda: return_rates.get().metrics()),
+        ('model', model_store.warmup)
+    ]
+    total = time.perf_counter()
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+            print(f"Preloaded {name:28s} {time.perf_counter() - start:8.3f}s")
+        except Exception as e:
+            print(f"Preload of {name} failed: {e}")
+    print(f"Preload finished in {time.perf_counter() - total:.3f}s")
+    return startup_report()
+
+@app.cli.command('preload')
+def preload_command():
+    """Load everything up front and print how long each part took."""
+    print(f"Imported app in {APP_IMPORT_SECONDS:.3f}s")
+    preload()
+
+APP_IMPORT_SECONDS = round(time.perf_counter() - _import_start, 4)
+
+# Hot workers, e.g. with gunicorn --preload so forked workers share the loaded data
+if os.environ.get('PRELOAD', '').lower() in ('1', 'true', 'yes'):
+    preload()
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', debug=True)
\ No newline at end of file
@@ -0,0 +1,202 @@
+import bisect
+import os
+import pickle
+
+import numpy as np
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_PATH = os.path.join(API_DIR, 'autocomplete_index.pkl')
+
+FIELDS = ['BIKE_MAKE', 'BIKE_MODEL']
+# Fuzzy suggestions need at least this trigram similarity (Jaccard, 0 to 1)
+MIN_SIMILARITY = 0.3
+
+
+def normalize_key(value) -> str:
+    """Case-folded value with runs of whitespace collapsed, the key every lookup uses."""
+    return ' '.join(str(value).casefold().split())
+
+
+def trigrams(key: str) -> set:
+    """Character trigrams of a key, padded so short keys and word starts still produce some."""
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FieldIndex:
+    """Canonical values of one field, sorted by key, with frequencies and trigram postings.
+
+    Value ids are positions in key order, so a prefix is one contiguous id
+    range found by bisection. Each trigram maps to the ids containing it.
+    """
+
+    def __init__(self, values, keys, counts, postings, n_trigrams):
+        self.values = values
+        self.keys = keys
+        self.counts = counts
+        self.postings = postings
+        self.n_trigrams = n_trigrams
+        self.ids = {key: i for i, key in enumerate(keys)}
+
+    @classmethod
+    def build(cls, value_counts):
+        """Index a dict of raw value -> frequency.
+
+        Raw values that only differ in case or spacing share a key; the most
+        frequent spelling becomes the canonical value and the counts are summed.
+        """
+        merged = {}
+        for value, count in value_counts.items():
+            key = normalize_key(value)
+            if not key:
+                continue
+            best, best_count, total = merged.get(key, (value, -1, 0))
+            if count > best_count:
+                best, best_count = value, count
+            merged[key] = (best, best_count, total + count)
+
+        keys = sorted(merged)
+        values = [merged[key][0] for key in keys]
+        counts = np.array([merged[key][2] for key in keys], dtype=np.int64)
+        grams = {}
+        for i, key in enumerate(keys):
+            for gram in trigrams(key):
+                grams.setdefault(gram, []).append(i)
+        postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in grams.items()}
+        n_trigrams = np.array([len(trigrams(key)) for key in keys], dtype=np.int32)
+        return cls(values, keys, counts, postings, n_trigrams)
+
+    def lookup(self, value):
+        """Id of the value with the same key, or None."""
+        return self.ids.get(normalize_key(value))
+
+    def prefix(self, text, limit):
+        """Ids of the most frequent values whose key starts with text."""
+        key = normalize_key(text)
+        lo = bisect.bisect_left(self.keys, key)
+        hi = bisect.bisect_left(self.keys, key + '\U0010ffff', lo)
+        if hi - lo <= limit:
+            ids = np.arange(lo, hi)
+        else:
+            ids = lo + np.argpartition(-self.counts[lo:hi], limit - 1)[:limit]
+        # Most frequent first, ties in key order
+        return ids[np.lexsort((ids, -self.counts[ids]))]
+
+    def fuzzy(self, text, limit, min_similarity=MIN_SIMILARITY):
+        """(ids, similarities) of the values sharing the most trigrams with text, best first."""
+        grams = trigrams(normalize_key(text))
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        ids, shared = np.unique(np.concatenate(lists), return_counts=True)
+        similarity = shared / (len(grams) + self.n_trigrams[ids] - shared)
+        keep = similarity >= min_similarity
+        ids, similarity = ids[keep], similarity[keep]
+        order = np.lexsort((-self.counts[ids], -similarity))[:limit]
+        return ids[order], similarity[order]
+
+    def state(self):
+        return {'values': self.values, 'keys': self.keys, 'counts': self.counts,
+                'postings': self.postings, 'n_trigrams': self.n_trigrams}
+
+
+class AutocompleteIndex:
+    """Prefix and typo-tolerant suggestions for free-text fields, ranked by training frequency.
+
+    Built offline by data/build_autocomplete.py; the API loads the pickled
+    arrays and never has to scan a vocabulary per keystroke.
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    @classmethod
+    def build(cls, value_counts):
+        """Index a dict of field -> {raw value: frequency}."""
+        return cls({field: FieldIndex.build(counts) for field, counts in value_counts.items()})
+
+    def save(self, filepath=INDEX_PATH):
+        artifact = {field: index.state() for field, index in self.fields.items()}
+        with open(filepath, 'wb') as f:
+            pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, filepath=INDEX_PATH):
+        with open(filepath, 'rb') as f:
+            artifact = pickle.load(f)
+        return cls({field: FieldIndex(**state) for field, state in artifact.items()})
+
+    def suggest(self, field, text, limit=10):
+        """Prefix matches by frequency, topped up with fuzzy matches by similarity."""
+        index = self.fields[field]
+        results = [{'value': index.values[i], 'count': int(index.counts[i]), 'match': 'prefix', 'score': 1.0}
+                   for i in index.prefix(text, limit)]
+        if len(results) < limit:
+            seen = {result['value'] for result in results}
+            ids, similarity = index.fuzzy(text, limit + len(results))
+            for i, score in zip(ids, similarity):
+                if index.values[i] not in seen and len(results) < limit:
+                    results.append({'value': index.values[i], 'count': int(index.counts[i]),
+                                    'match': 'fuzzy', 'score': round(float(score), 3)})
+        return results
+
+
+class CategoryNormalizer:
+    """Maps typed makes and models onto the categories of the served model's vocabulary.
+
+    Only spellings that differ from a category in case or spacing are
+    replaced. A typo can be closer to another product than to the one meant,
+    so near matches are left to /autocomplete suggestions and anything else
+    is scored as unknown. The autocomplete index, if given, picks the most
+    frequent category when several share a key.
+    """
+
+    def __init__(self, vocabulary, index=None, fields=FIELDS):
+        self.vocabulary = vocabulary
+        self.fields = {}
+        for field in fields:
+            if field not in vocabulary:
+                continue
+            suggestions = index.fields.get(field) if index is not None else None
+            best = {}
+            for value in vocabulary[field]:
+                key = normalize_key(value)
+                i = suggestions.lookup(value) if suggestions is not None else None
+                count = int(suggestions.counts[i]) if i is not None else 0
+                if key and count > best.get(key, (None, -1))[1]:
+                    best[key] = (value, count)
+            self.fields[field] = {key: value for key, (value, _) in best.items()}
+
+    def normalize(self, field, value):
+        """The vocabulary category a typed value means, or the value unchanged.
+
+        Exact categories are kept as they are, values with the same key as a
+        category get that category's spelling.
+        """
+        categories = self.fields.get(field)
+        if categories is None or not isinstance(value, str) or value in self.vocabulary[field]:
+            return value
+        return categories.get(normalize_key(value), value)
+
+    def normalize_record(self, record):
+        """A copy of a raw /predict record with its free-text fields normalized."""
+        record = dict(record)
+        for field in self.fields:
+            if record.get(field) is not None:
+                record[field] = self.normalize(field, record[field])
+        return record
+
+    def normalize_frame(self, df):
+        """Normalize the free-text columns of a batch in place, each distinct value once."""
+        for field in self.fields:
+            if field not in df.columns:
+                continue
+            changed = {}
+            for value in df[field].dropna().unique():
+                normalized = self.normalize(field, value)
+                if normalized != value:
+                    changed[value] = normalized
+            if changed:
+                rows = df[field].isin(changed)
+                df.loc[rows, field] = df.loc[rows, field].map(changed)
+        return df
@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from metrics import Histogram
+
+# Queue wait in seconds and batch sizes in records
+QUEUE_WAIT_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+class QueueFullError(Exception):
+    """Raised when the prediction queue has reached its maximum depth."""
+
+
+class PredictionTimeoutError(Exception):
+    """Raised when a queued prediction has no result within the batcher's timeout."""
+
+
+class MicroBatcher:
+    """Coalesce concurrent single predictions into small batches.
+
+    Requests wait at most max_wait_ms after the first one in the window
+    arrives, or until max_batch_size requests are queued. The batch is then
+    scored with one call to score_fn, which takes a list of records and
+    returns one result per record in the same order. A caller waits at most
+    two batching windows plus score_budget_ms for its result, so a stalled
+    worker thread cannot hold request threads forever.
+    """
+
+    def __init__(self, score_fn, max_batch_size=64, max_wait_ms=2.0, max_queue_depth=1024, score_budget_ms=5000.0):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = 2 * self.max_wait + score_budget_ms / 1000.0
+        self.queue_wait = Histogram(QUEUE_WAIT_BUCKETS)
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self._queue = queue.Queue(maxsize=max_queue_depth)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, record, timeout=None):
+        """Queue one record and block until its result is available, at most timeout seconds.
+
+        The timeout defaults to self.timeout. A record that times out before
+        its batch starts is dropped from the queue without being scored.
+        """
+        self._ensure_worker()
+        future = Future()
+        try:
+            self._queue.put_nowait((record, future, time.perf_counter()))
+        except queue.Full:
+            raise QueueFullError("Prediction queue is full, please retry later")
+        try:
+            return future.result(self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PredictionTimeoutError("Prediction timed out, please retry later")
+
+    def stats(self) -> dict:
+        """Return the current configuration and histograms."""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'max_queue_depth': self._queue.maxsize,
+            'timeout_ms': self.timeout * 1000.0,
+            'queue_depth': self._queue.qsize(),
+            'queue_wait_seconds': self.queue_wait.snapshot(),
+            'batch_size': self.batch_size.snapshot()
+        }
+
+    def _ensure_worker(self):
+        # Started lazily so that forked server workers each get their own thread
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='predict-batcher', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Past the deadline, still take whatever is already waiting
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Callers that already gave up cancelled their futures, skip their records
+            batch = [item for item in self._next_batch() if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                self.queue_wait.observe(started - enqueued)
+            self.batch_size.observe(len(batch))
+
+            try:
+                results = self.score_fn([record for record, _, _ in batch])
+            except Exception:
+                # Score each record alone, so only the one that fails gets the exception
+                for record, future, _ in batch:
+                    try:
+                        future.set_result(self.score_fn([record])[0])
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
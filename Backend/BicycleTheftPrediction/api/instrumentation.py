@@ -0,0 +1,66 @@
+import cProfile
+import io
+import os
+import pstats
+import time
+
+from flask import Response, g, request
+
+from metrics import REGISTRY
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def instrument_app(app, registry=REGISTRY, profile_dir=None):
+    """Record per-endpoint latency and in-flight requests, and serve them at /metrics.
+
+    Sending the header 'X-Profile: 1' runs that one request under cProfile
+    when profile_dir is set. The stats are written to profile_dir and the
+    file name is returned in the X-Profile-Output response header.
+    """
+    in_flight = registry.gauge('http_requests_in_flight', 'Requests currently being handled')
+
+    @app.before_request
+    def _start_request():
+        g.request_start = time.perf_counter()
+        in_flight.inc()
+        if profile_dir and request.headers.get('X-Profile') == '1':
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def _record_request(response):
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            response.headers['X-Profile-Output'] = _save_profile(profiler, profile_dir)
+
+        start = g.pop('request_start', None)
+        if start is not None:
+            # The URL rule rather than the path, so label values stay bounded
+            endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            registry.histogram('http_request_duration_seconds', 'Request latency by endpoint',
+                               endpoint=endpoint, method=request.method).observe(time.perf_counter() - start)
+            registry.counter('http_requests_total', 'Requests by endpoint and status', endpoint=endpoint,
+                             method=request.method, status=response.status_code).inc()
+        return response
+
+    @app.teardown_request
+    def _end_request(exc):
+        in_flight.dec()
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def _save_profile(profiler, profile_dir):
+    os.makedirs(profile_dir, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unmatched'}-{os.getpid()}.prof"
+    path = os.path.join(profile_dir, name)
+    profiler.dump_stats(path)
+
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(15)
+    print(f"Profile of {request.method} {request.path} saved to {path}\n{summary.getvalue()}")
+    return name
@@ -0,0 +1,76 @@
+import importlib
+import sys
+import threading
+import time
+
+# Seconds spent importing each module loaded through import_module, in load order
+IMPORT_SECONDS = {}
+# Every Lazy value by name, for the startup report
+LAZY_VALUES = {}
+
+
+def import_module(name):
+    """importlib.import_module, recording how long the first import took."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_SECONDS.setdefault(name, round(time.perf_counter() - start, 4))
+    return module
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(import_module(self._name), attr)
+
+
+class Lazy:
+    """A value built by factory() on first use, once, even with concurrent callers."""
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        # (value, load seconds), replaced as one tuple so readers never see half a reset
+        self._state = None
+        self._lock = threading.Lock()
+        LAZY_VALUES[name] = self
+
+    @property
+    def loaded(self):
+        return self._state is not None
+
+    @property
+    def load_seconds(self):
+        state = self._state
+        return state[1] if state is not None else None
+
+    def get(self):
+        state = self._state
+        if state is None:
+            with self._lock:
+                state = self._state
+                if state is None:
+                    start = time.perf_counter()
+                    value = self.factory()
+                    state = self._state = (value, round(time.perf_counter() - start, 4))
+        return state[0]
+
+    def reset(self):
+        """Drop the value, so the next get() builds it again."""
+        with self._lock:
+            self._state = None
+
+
+def startup_report():
+    """Import times and which lazy values are loaded, with their build times."""
+    return {
+        'imports': dict(IMPORT_SECONDS),
+        'lazy': {name: {'loaded': value.loaded, 'load_seconds': value.load_seconds}
+                 for name, value in LAZY_VALUES.items()}
+    }
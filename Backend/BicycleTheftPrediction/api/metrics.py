@@ -0,0 +1,151 @@
+import bisect
+import threading
+import time
+
+
+class Histogram:
+    """Thread-safe histogram with fixed bucket upper bounds (Prometheus style)."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        """Return cumulative bucket counts, sum and count."""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        cumulative, running = {}, 0
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            running += n
+            cumulative['+Inf' if bound == float('inf') else repr(bound)] = running
+        return {'buckets': cumulative, 'sum': total, 'count': count}
+
+
+# Latency buckets in seconds, from tens of microseconds (single stages) to seconds (whole batches)
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Counter:
+    """Thread-safe monotonically increasing value."""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge(Counter):
+    """Thread-safe value that can go up and down."""
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+class _Span:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in tuple(labels) + tuple(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class MetricsRegistry:
+    """Named counters, gauges and histograms with labels, rendered in Prometheus text format.
+
+    Metrics are created on first use, so call sites simply ask for the metric
+    and label values they need.
+    """
+
+    def __init__(self):
+        self._families = {}
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name, help_text, labels, factory):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    family = self._families.setdefault(name, (kind, help_text, {}))
+                    if family[0] != kind:
+                        raise ValueError(f"Metric {name} is already registered as a {family[0]}")
+                    metric = family[2][key[1]] = self._metrics[key] = factory()
+        return metric
+
+    def counter(self, name, help_text, **labels) -> Counter:
+        return self._get('counter', name, help_text, labels, Counter)
+
+    def gauge(self, name, help_text, **labels) -> Gauge:
+        return self._get('gauge', name, help_text, labels, Gauge)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, **labels) -> Histogram:
+        return self._get('histogram', name, help_text, labels, lambda: Histogram(buckets))
+
+    def register(self, name, help_text, histogram, **labels) -> Histogram:
+        """Expose an existing Histogram, e.g. one owned by the request coalescer."""
+        return self._get('histogram', name, help_text, labels, lambda: histogram)
+
+    def span(self, stage: str) -> _Span:
+        """Context manager timing one stage into stage_duration_seconds{stage=...}."""
+        return _Span(self.histogram('stage_duration_seconds', 'Time spent in each hot-path stage', stage=stage))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            families = [(name, kind, help_text, list(children.items()))
+                        for name, (kind, help_text, children) in sorted(self._families.items())]
+
+        lines = []
+        for name, kind, help_text, children in families:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, metric in children:
+                if kind == 'histogram':
+                    snapshot = metric.snapshot()
+                    for bound, count in snapshot['buckets'].items():
+                        lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {count}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {snapshot["sum"]}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {snapshot["count"]}')
+                else:
+                    lines.append(f'{name}{_format_labels(labels)} {metric.value}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry used by the API and the modules it instruments
+REGISTRY = MetricsRegistry()
+span = REGISTRY.span
@@ -0,0 +1,194 @@
+import os
+import resource
+import threading
+import time
+
+import joblib
+import numpy as np
+
+from model_registry import ModelRegistry
+from tree_engine import TreeEnsemble
+
+
+class ModelStore:
+    """The served model, its feature order and the category vocabulary, loaded on first use.
+
+    Files come from the live version of the model registry under
+    models/registry/, or straight from models/ when nothing was published.
+
+    The flattened tree ensemble is memory-mapped read-only: its node arrays
+    stay in the shared page cache, so API worker processes serving the same
+    file do not each hold a private copy. The pickled sklearn model is the
+    fallback and is loaded normally, since sklearn copies tree nodes out of
+    any mapping when it unpickles them.
+
+    Every check_interval seconds (None disables it) get() compares the
+    registry's live version with the one loaded and reloads when they differ,
+    so every worker process follows a version switch on its next request.
+    """
+
+    def __init__(self, models_dir, use_tree_engine=True, mmap_mode='r', check_interval=5.0):
+        self.models_dir = models_dir
+        self.registry = ModelRegistry(os.path.join(models_dir, 'registry'))
+        self.use_tree_engine = use_tree_engine
+        self.mmap_mode = mmap_mode
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        # (model, feature order, vocabulary, info), swapped as one tuple so a
+        # request that already holds the old version keeps a consistent set
+        self._loaded = None
+        self._next_check = 0.0
+        # Set by request_reload(), e.g. from a signal handler, and acted on by get()
+        self._reload_requested = False
+
+    def _artifact_dir(self):
+        """The live registry version and its directory, or the flat models/ layout."""
+        version = self.registry.live_version()
+        if version is None:
+            return None, self.models_dir
+        return version, self.registry.version_dir(version)
+
+    def _load(self):
+        start = time.perf_counter()
+        version, directory = self._artifact_dir()
+        trees_path = os.path.join(directory, 'best_model_trees.pkl')
+        vocabulary_path = os.path.join(directory, 'category_vocabulary.pkl')
+
+        if self.use_tree_engine and os.path.exists(trees_path):
+            artifact, model = trees_path, TreeEnsemble.load(trees_path, mmap_mode=self.mmap_mode)
+        else:
+            artifact = os.path.join(directory, 'best_model.pkl')
+            model = joblib.load(artifact)
+        feature_order = joblib.load(os.path.join(directory, 'feature_order.pkl'))
+
+        if os.path.exists(vocabulary_path):
+            vocabulary = joblib.load(vocabulary_path)
+        else:
+            print("Warning: Category vocabulary not found. Encoders will be fitted per request.")
+            vocabulary = None
+
+        info = {
+            'loaded': True,
+            'version': version,
+            'artifact': artifact,
+            'engine': type(model).__name__,
+            'memory_mapped': artifact == trees_path and self.mmap_mode is not None,
+            'load_seconds': round(time.perf_counter() - start, 4)
+        }
+        return model, feature_order, vocabulary, info
+
+    def available(self):
+        """Whether the model files exist, without loading them."""
+        if self._loaded is not None:
+            return True
+        _, directory = self._artifact_dir()
+        has_model = os.path.exists(os.path.join(directory, 'best_model.pkl')) or (
+            self.use_tree_engine and os.path.exists(os.path.join(directory, 'best_model_trees.pkl')))
+        return has_model and os.path.exists(os.path.join(directory, 'feature_order.pkl'))
+
+    def get(self):
+        """Return (model, feature_order, vocabulary), loading them on the first call.
+
+        Returns (None, None, None) while the model has not been trained.
+        """
+        if self._loaded is None:
+            with self._lock:
+                if self._loaded is None:
+                    if not self.available():
+                        return None, None, None
+                    self._loaded = self._load()
+                    self._reload_requested = False
+                    self._next_check = self._after_interval()
+        elif self._reload_requested or time.monotonic() >= self._next_check:
+            self._refresh()
+        return self._loaded[:3]
+
+    def _after_interval(self):
+        return time.monotonic() + self.check_interval if self.check_interval is not None else float('inf')
+
+    def _refresh(self):
+        """Reload if asked to or if the live version moved; other threads keep serving meanwhile."""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            requested, self._reload_requested = self._reload_requested, False
+            self._next_check = self._after_interval()
+            if requested or self.registry.live_version() != self._loaded[3]['version']:
+                if self.available():
+                    self._loaded = self._load()
+                    print(f"Loaded model version {self._loaded[3]['version']} from {self._loaded[3]['artifact']}")
+        except Exception as e:
+            print(f"Model reload failed, keeping the current version: {e}")
+        finally:
+            self._lock.release()
+
+    def request_reload(self):
+        """Reload on the next get(). Takes no lock, so it is safe in a signal handler."""
+        self._reload_requested = True
+
+    def reload(self):
+        """Load the current live version and swap it in.
+
+        The new version is loaded completely before the swap, so requests keep
+        being served by the old one meanwhile, and a version that fails to
+        load leaves the old one in place. Returns the new model info.
+        """
+        with self._lock:
+            if not self.available():
+                raise FileNotFoundError("Model files not found. Please train the model first.")
+            self._loaded = self._load()
+            self._reload_requested = False
+            self._next_check = self._after_interval()
+            return dict(self._loaded[3])
+
+    def version(self):
+        """The registry version being served, None for the flat layout or before loading."""
+        return self._loaded[3]['version'] if self._loaded is not None else None
+
+    def metrics(self):
+        """Metrics of the served registry version, or None."""
+        version = self.version()
+        return self.registry.metrics(version) if version is not None else None
+
+    def warmup(self):
+        """Load the model and score one row, so the first request does not pay for it."""
+        model, feature_order, _ = self.get()
+        if model is None:
+            print("Warning: Model files not found. Please train the model first.")
+            return False
+        model.predict_proba(np.zeros((1, len(feature_order))))
+        return True
+
+    def info(self):
+        """Which artifact is served and how it was loaded."""
+        return dict(self._loaded[3]) if self._loaded is not None else {'loaded': False}
+
+
+def process_memory():
+    """Resident memory of this process in MB, split into shared and private pages.
+
+    PSS charges each shared page to the processes mapping it in equal parts,
+    so summing it over all workers gives their real combined footprint.
+    Reads /proc/self/smaps_rollup on Linux and falls back to the peak RSS
+    from getrusage elsewhere.
+    """
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1])
+    except OSError:
+        return {'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+
+    def mb(*names):
+        return round(sum(fields.get(name, 0) for name in names) / 1024, 1)
+
+    return {
+        'rss_mb': mb('Rss'),
+        'pss_mb': mb('Pss'),
+        'shared_mb': mb('Shared_Clean', 'Shared_Dirty'),
+        'private_mb': mb('Private_Clean', 'Private_Dirty'),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
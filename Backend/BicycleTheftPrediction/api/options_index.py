@@ -0,0 +1,83 @@
+import bisect
+import gzip
+import hashlib
+import json
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+# (gzip level, brotli quality): maximum for payloads stored once, cheapest for per-request ones
+STORED_COMPRESSION = (9, 11)
+DYNAMIC_COMPRESSION = (1, 1)
+
+
+class Payload:
+    """A JSON body serialized once, with its compressed variants and strong ETags.
+
+    Each content coding is a different representation, so each gets its own
+    ETag; any of them in If-None-Match means the client has this payload.
+    Pass DYNAMIC_COMPRESSION for bodies built per request.
+    """
+
+    def __init__(self, obj, compression=STORED_COMPRESSION):
+        self.body = json.dumps(obj, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.blake2b(self.body, digest_size=16).hexdigest()
+        self.encodings = {'identity': self.body}
+        if len(self.body) >= MIN_COMPRESS_BYTES:
+            # mtime=0 keeps the gzip bytes identical across processes and restarts
+            gzip_level, brotli_quality = compression
+            self.encodings['gzip'] = gzip.compress(self.body, compresslevel=gzip_level, mtime=0)
+            if brotli is not None:
+                self.encodings['br'] = brotli.compress(self.body, quality=brotli_quality)
+        self.etags = {encoding: f'"{digest}"' if encoding == 'identity' else f'"{digest}-{encoding}"'
+                      for encoding in self.encodings}
+
+    def matches(self, if_none_match):
+        """Whether an If-None-Match header names one of this payload's ETags."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        # Weak comparison, as RFC 7232 requires for If-None-Match
+        tags = {tag[2:] if tag.startswith('W/') else tag for tag in map(str.strip, if_none_match.split(','))}
+        return not tags.isdisjoint(self.etags.values())
+
+    def select(self, accept_encodings):
+        """The best (encoding, body) for a werkzeug Accept-Encoding header."""
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encodings and accept_encodings[encoding]:
+                return encoding, self.encodings[encoding]
+        return 'identity', self.body
+
+
+class OptionsIndex:
+    """The field options of the prediction form, pre-serialized and indexed for prefix search.
+
+    The whole dict and each single field are serialized and compressed once.
+    Prefix queries bisect a case-folded, sorted copy of each field's values.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self.payload = Payload(options)
+        self.field_payloads = {field: Payload({field: values}) for field, values in options.items()}
+        self._sorted = {}
+        for field, values in options.items():
+            pairs = sorted(((str(value).casefold(), value) for value in values), key=lambda pair: pair[0])
+            self._sorted[field] = ([key for key, _ in pairs], [value for _, value in pairs])
+
+    def search(self, field, prefix, limit=50):
+        """Up to limit values of field starting with prefix (case-insensitive), in sorted order."""
+        keys, values = self._sorted[field]
+        prefix = prefix.casefold()
+        start = bisect.bisect_left(keys, prefix)
+        matches = []
+        for i in range(start, min(len(keys), start + limit)):
+            if not keys[i].startswith(prefix):
+                break
+            matches.append(values[i])
+        return matches
@@ -0,0 +1,101 @@
+import hashlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    """Bounded LRU of class probabilities keyed by the encoded feature row.
+
+    Keys are hashes of the rows after preprocess_features, so requests that
+    only differ in fields the model never sees share an entry. Entries older
+    than ttl_seconds (if set) count as misses. The cache empties itself when
+    it is asked to score with a new model object, e.g. after a reload.
+    Requests still holding a model that was replaced bypass the cache, so
+    they neither clear it again nor store the old model's probabilities.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=None):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model = None
+        self._retired = weakref.WeakSet()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'clears': 0, 'bypassed': 0}
+
+    @staticmethod
+    def row_keys(X):
+        """One digest per row of the feature matrix."""
+        rows = np.ascontiguousarray(np.asarray(X, dtype=np.float64))
+        return [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in rows]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters['clears'] += 1
+
+    def predict_proba(self, model, X):
+        """model.predict_proba(X), scoring only the rows that are not cached."""
+        if model is not self._model:
+            stale = False
+            with self._lock:
+                if model is not self._model:
+                    if model in self._retired:
+                        self._counters['bypassed'] += len(X)
+                        stale = True
+                    else:
+                        if self._model is not None:
+                            self._counters['clears'] += 1
+                            self._retired.add(self._model)
+                        self._entries.clear()
+                        self._model = model
+            if stale:
+                return np.asarray(model.predict_proba(X))
+
+        keys = self.row_keys(X)
+        cached = [None] * len(keys)
+        now = time.monotonic()
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and self.ttl is not None and now - entry[1] > self.ttl:
+                    del self._entries[key]
+                    self._counters['expired'] += 1
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    cached[i] = entry[0]
+            hits = sum(value is not None for value in cached)
+            self._counters['hits'] += hits
+            self._counters['misses'] += len(keys) - hits
+
+        missing = [i for i, value in enumerate(cached) if value is None]
+        if missing:
+            rows = X.iloc[missing] if hasattr(X, 'iloc') else np.asarray(X)[missing]
+            scored = np.asarray(model.predict_proba(rows))
+            with self._lock:
+                # A reload while scoring: the result is still right for this request, but not cacheable
+                cacheable = self._model is model
+                for i, probabilities in zip(missing, scored):
+                    cached[i] = probabilities
+                    if cacheable:
+                        self._entries[keys[i]] = (probabilities, now)
+                        self._entries.move_to_end(keys[i])
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._counters['evictions'] += 1
+        return np.vstack(cached) if cached else np.empty((0, 0))
+
+    def stats(self):
+        """Counters, current size and hit ratio."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats.update(max_entries=self.max_entries, ttl_seconds=self.ttl,
+                     hit_ratio=round(stats['hits'] / lookups, 4) if lookups else None)
+        return stats
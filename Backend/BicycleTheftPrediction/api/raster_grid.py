@@ -0,0 +1,111 @@
+import argparse
+import math
+import os
+import struct
+
+import numpy as np
+import shapely
+
+GRID_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'neighbourhood_grid.bin')
+
+# Cell codes besides the H140 of the polygon that fully contains the cell
+OUTSIDE = 0
+BOUNDARY = -1
+
+_MAGIC = b'NBHDGRD1'
+_HEADER = struct.Struct('<8sdddii')  # magic, origin x, origin y, cell size, rows, columns
+
+
+class NeighbourhoodGrid:
+    """Raster of the neighbourhood polygons in EPSG:3857 coordinates.
+
+    Each cell holds the H140 of the only polygon that contains it, OUTSIDE
+    when no polygon touches it, or BOUNDARY when the exact polygon test is
+    still needed.
+    """
+
+    def __init__(self, cells, x0: float, y0: float, cell_size: float):
+        self.cells = cells
+        self.x0 = x0
+        self.y0 = y0
+        self.cell_size = cell_size
+
+    @classmethod
+    def build(cls, rtree, cell_size: float = 100.0):
+        """Rasterize the polygons of an RTree at the given cell size in metres."""
+        bounds = np.array([geofence["polygon"].bounds for geofence in rtree.polygons.values()])
+        x0, y0 = bounds[:, 0].min(), bounds[:, 1].min()
+        n_cols = int(np.ceil((bounds[:, 2].max() - x0) / cell_size))
+        n_rows = int(np.ceil((bounds[:, 3].max() - y0) / cell_size))
+
+        touching = np.zeros((n_rows, n_cols), dtype=np.int16)
+        owner = np.zeros((n_rows, n_cols), dtype=np.int16)
+
+        for h140, geofence in rtree.polygons.items():
+            polygon = geofence["polygon"]
+            min_x, min_y, max_x, max_y = polygon.bounds
+            cols = np.arange(int((min_x - x0) // cell_size), min(int((max_x - x0) // cell_size) + 1, n_cols))
+            rows = np.arange(int((min_y - y0) // cell_size), min(int((max_y - y0) // cell_size) + 1, n_rows))
+            col_grid, row_grid = np.meshgrid(cols, rows)
+            boxes = shapely.box(x0 + col_grid * cell_size, y0 + row_grid * cell_size,
+                                x0 + (col_grid + 1) * cell_size, y0 + (row_grid + 1) * cell_size)
+
+            touching[row_grid, col_grid] += shapely.intersects(polygon, boxes)
+            inside = shapely.contains_properly(polygon, boxes)
+            owner[row_grid[inside], col_grid[inside]] = h140
+
+        cells = np.where(touching == 0, OUTSIDE, np.where((touching == 1) & (owner > 0), owner, BOUNDARY))
+        return cls(cells.astype(np.int16), x0, y0, cell_size)
+
+    def save(self, filepath: str = GRID_PATH) -> None:
+        """Write the header and the raw int16 cells."""
+        n_rows, n_cols = self.cells.shape
+        with open(filepath, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, self.x0, self.y0, self.cell_size, n_rows, n_cols))
+            f.write(np.ascontiguousarray(self.cells, dtype='<i2').tobytes())
+
+    @classmethod
+    def load(cls, filepath: str = GRID_PATH):
+        """Memory-map a saved grid, so worker processes share its pages."""
+        with open(filepath, 'rb') as f:
+            magic, x0, y0, cell_size, n_rows, n_cols = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError(f"{filepath} is not a neighbourhood grid")
+        cells = np.memmap(filepath, dtype='<i2', mode='r', offset=_HEADER.size, shape=(n_rows, n_cols))
+        return cls(cells, x0, y0, cell_size)
+
+    def lookup(self, x: float, y: float) -> int:
+        """Return the cell code for one projected point."""
+        # NaN or infinite coordinates (e.g. a NaN latitude) match no neighbourhood
+        if not (math.isfinite(x) and math.isfinite(y)):
+            return OUTSIDE
+        col = int((x - self.x0) // self.cell_size)
+        row = int((y - self.y0) // self.cell_size)
+        if 0 <= row < self.cells.shape[0] and 0 <= col < self.cells.shape[1]:
+            return int(self.cells[row, col])
+        return OUTSIDE
+
+    def lookup_many(self, xs, ys):
+        """Return the cell codes for arrays of projected points."""
+        with np.errstate(invalid='ignore'):
+            cols = np.floor((np.asarray(xs) - self.x0) / self.cell_size)
+            rows = np.floor((np.asarray(ys) - self.y0) / self.cell_size)
+        valid = (rows >= 0) & (rows < self.cells.shape[0]) & (cols >= 0) & (cols < self.cells.shape[1])
+        codes = np.full(valid.shape, OUTSIDE, dtype=np.int16)
+        codes[valid] = self.cells[rows[valid].astype(np.intp), cols[valid].astype(np.intp)]
+        return codes
+
+
+if __name__ == '__main__':
+    from rtree_search import RTree
+
+    parser = argparse.ArgumentParser(description='Precompute the neighbourhood lookup grid.')
+    parser.add_argument('--cell-size', type=float, default=100.0, help='Cell size in metres (EPSG:3857)')
+    parser.add_argument('--output', default=GRID_PATH)
+    args = parser.parse_args()
+
+    grid = NeighbourhoodGrid.build(RTree(use_grid=False), args.cell_size)
+    grid.save(args.output)
+    resolved = np.count_nonzero(grid.cells != BOUNDARY) / grid.cells.size
+    print(f"Grid {grid.cells.shape[0]}x{grid.cells.shape[1]} saved to {args.output} "
+          f"({resolved:.1%} of cells answered without a polygon test)")
@@ -1,8 +1,18 @@
 import json
-from shapely.geometry import Point, Polygon
+import os
+import pickle
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
 from pyproj import Transformer
 from rtree import index
 from h158_to_h140 import converter
+from raster_grid import NeighbourhoodGrid, GRID_PATH, OUTSIDE, BOUNDARY
+from metrics import span
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+GEODATA_PATH = os.path.join(API_DIR, 'toronto_map_data_extracted.json')
+INDEX_PATH = os.path.join(API_DIR, 'toronto_map_data.pkl')
 
 
 def convert_to_140(h158: int) -> (str, str):
@@ -12,43 +22,118 @@ def convert_to_140(h158: int) -> (str, str):
         return h140
 
 
+def load_regions(filepath: str) -> tuple[list[int], list[str], list[Polygon]]:
+    """Read the H140 codes, N140 names and polygons from the extracted GeoJSON."""
+    with open(filepath) as f:
+        data: dict[str, list[dict[str, str | list[list[float]]]]] = json.load(f)
+
+    h140s, n140s, polygons = [], [], []
+    for region in data['regions']:
+        h140s.append(int(region['HOOD_140']))
+        n140s.append(region['NEIGHBOURHOOD_140'])
+        polygons.append(Polygon(region['geometry']))
+    return h140s, n140s, polygons
+
+
+def save_index_artifact(h140s: list[int], n140s: list[str], polygons: list[Polygon], filepath: str = INDEX_PATH) -> None:
+    """Write the regions as WKB with their H140 remap already applied."""
+    artifact = {
+        'h140': list(h140s),
+        'n140': list(n140s),
+        'results': [RTree._resolve(h140, n140) for h140, n140 in zip(h140s, n140s)],
+        'wkb': shapely.to_wkb(np.asarray(polygons, dtype=object)),
+    }
+    with open(filepath, 'wb') as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
 class RTree:
     """Spatial index using R-tree."""
 
-    def __init__(self):
-        with open("toronto_map_data_extracted.json") as f:
-            data: dict[str, list[dict[str, str | list[list[float]]]]] = json.load(f)
-
-        self.index = index.Index()
+    def __init__(self, use_grid: bool = True):
+        # The binary artifact from refactor_geodata.py skips JSON parsing entirely
+        if os.path.exists(INDEX_PATH):
+            with open(INDEX_PATH, 'rb') as f:
+                artifact = pickle.load(f)
+            h140s, n140s, results = artifact['h140'], artifact['n140'], artifact['results']
+            polygons = shapely.from_wkb(artifact['wkb'])
+        else:
+            h140s, n140s, polygons = load_regions(GEODATA_PATH)
+            results = [self._resolve(h140, n140) for h140, n140 in zip(h140s, n140s)]
+
+        # Built once and reused, creating a transformer is far slower than using one
+        self.transformer = Transformer.from_crs("EPSG:4326", "EPSG:3857", always_xy=True)
         self.polygons = {}
 
-        for region in data['regions']:
-            n140, h140, geometry = region['NEIGHBOURHOOD_140'], int(region['HOOD_140']), region['geometry']
-            polygon = Polygon(geometry)
-            self.polygons[h140] = {"polygon": polygon, "n140": n140}
-            self.index.insert(h140, polygon.bounds)
+        for h140, n140, polygon, result in zip(h140s, n140s, polygons, results):
+            shapely.prepare(polygon)
+            self.polygons[h140] = {"polygon": polygon, "n140": n140, "result": tuple(result)}
 
-    def search(self, lat: float, lon: float) -> tuple[str, str]:
-        """Search for the H140 and N140 codes for a given latitude and longitude."""
-        transformer = Transformer.from_crs("EPSG:4326", "EPSG:3857", always_xy=True)
-        x, y = transformer.transform(lon, lat)
-        point = Point(x, y)
+        # Bulk (stream) loading packs the tree in one pass instead of one insert per polygon
+        self.index = index.Index((h140, geofence["polygon"].bounds, None) for h140, geofence in self.polygons.items())
 
-        candidates = list(self.index.intersection((x, y, x, y)))
+        # Optional precomputed raster, built with raster_grid.py
+        self.grid = NeighbourhoodGrid.load(GRID_PATH) if use_grid and os.path.exists(GRID_PATH) else None
 
-        for h140 in candidates:
-            str_h140 = str(h140).zfill(3)
-            geofence = self.polygons[h140]
-            polygon = geofence["polygon"]
+    @staticmethod
+    def _resolve(h140: int, n140: str) -> tuple[str, str]:
+        """Return the H140 and N140 codes reported for a matched polygon."""
+        res = convert_to_140(h140)
+        if res:
+            return res
+        return str(h140).zfill(3), n140
 
-            if polygon.contains(point):
-                res = convert_to_140(h140)
-                if res:
-                    return res
-                return str_h140, geofence["n140"]
+    def search(self, lat: float, lon: float) -> tuple[str, str]:
+        """Search for the H140 and N140 codes for a given latitude and longitude."""
+        with span('rtree.transform'):
+            x, y = self.transformer.transform(lon, lat)
+
+        if self.grid is not None:
+            with span('rtree.grid'):
+                code = self.grid.lookup(x, y)
+            if code == OUTSIDE:
+                return "NSA", "NSA"
+            if code != BOUNDARY:
+                return self.polygons[code]["result"]
+
+        with span('rtree.index_query'):
+            candidates = list(self.index.intersection((x, y, x, y)))
+        with span('rtree.polygon_test'):
+            for h140 in candidates:
+                geofence = self.polygons[h140]
+                if shapely.contains_xy(geofence["polygon"], x, y):
+                    return geofence["result"]
 
         return "NSA", "NSA"
 
+    def search_many(self, lats, lons) -> list[tuple[str, str]]:
+        """Search the H140 and N140 codes for arrays of latitudes and longitudes.
+
+        All points are projected in one call, then each polygon tests the points
+        inside its bounding box in a single vectorized containment check.
+        """
+        xs, ys = self.transformer.transform(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+        xs, ys = np.atleast_1d(xs), np.atleast_1d(ys)
+        matched = np.full(xs.shape, -1)
+
+        if self.grid is not None:
+            codes = self.grid.lookup_many(xs, ys)
+            matched[codes > 0] = codes[codes > 0]
+            pending = np.flatnonzero(codes == BOUNDARY)
+        else:
+            pending = np.arange(xs.size)
+
+        # Exact test only for the points the grid could not answer
+        px, py = xs[pending], ys[pending]
+        for h140, geofence in self.polygons.items():
+            min_x, min_y, max_x, max_y = geofence["polygon"].bounds
+            candidates = np.flatnonzero((matched[pending] < 0) & (px >= min_x) & (px <= max_x) & (py >= min_y) & (py <= max_y))
+            if candidates.size:
+                inside = shapely.contains_xy(geofence["polygon"], px[candidates], py[candidates])
+                matched[pending[candidates[inside]]] = h140
+
+        return [self.polygons[h140]["result"] if h140 >= 0 else ("NSA", "NSA") for h140 in matched.tolist()]
+
 
 if __name__ == '__main__':
     rtree = RTree()
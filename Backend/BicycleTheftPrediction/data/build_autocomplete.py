@@ -0,0 +1,47 @@
+import argparse
+import json
+import os
+import sys
+
+import pandas as pd
+
+# Reuse the API's index so the artifact matches what the autocomplete endpoint loads
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+from autocomplete import FIELDS, INDEX_PATH, AutocompleteIndex
+
+
+def value_counts(data_path, options_path=None):
+    """Frequency of every value of the indexed fields in the training data.
+
+    Values that only appear in the form options are added with a count of 0,
+    so they can be suggested but rank below anything seen in training.
+    """
+    data = pd.read_csv(data_path, usecols=FIELDS, dtype=str)
+    counts = {field: data[field].dropna().value_counts().to_dict() for field in FIELDS}
+    if options_path:
+        with open(options_path) as f:
+            options = json.load(f)
+        for field in FIELDS:
+            for value in options.get(field, []):
+                counts[field].setdefault(str(value), 0)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the bike make/model autocomplete index.')
+    parser.add_argument('--data', default='Bicycle_Thefts_Data.csv')
+    parser.add_argument('--options', default='../api/unique_values.json',
+                        help="Form options to include with a count of 0, '' to skip")
+    parser.add_argument('--output', default=INDEX_PATH)
+    args = parser.parse_args()
+
+    counts = value_counts(args.data, args.options or None)
+    AutocompleteIndex.build(counts).save(args.output)
+    for field in FIELDS:
+        trained = sum(count > 0 for count in counts[field].values())
+        print(f"{field}: {len(counts[field])} values, {trained} seen in training")
+    print(f"Autocomplete index saved to {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,10 @@
 import json
+import os
+import sys
+
+# Reuse the API's region loader so the binary index matches what RTree expects
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+from rtree_search import load_regions, save_index_artifact
 
 def refactor_geodata():
     with open('toronto_map_data_raw.json', 'r') as f:
@@ -16,5 +22,8 @@ def refactor_geodata():
     with open('../api/toronto_map_data_extracted.json', 'w') as f:
         json.dump(extracted, f, indent=4)
 
+    # Compact binary copy loaded by RTree at startup
+    save_index_artifact(*load_regions('../api/toronto_map_data_extracted.json'), '../api/toronto_map_data.pkl')
+
 
 refactor_geodata()
\ No newline at end of file
@@ -0,0 +1,52 @@
+import argparse
+import os
+import resource
+import time
+
+import joblib
+
+from columnar import ColumnarWriter
+from data_preprocessing import (CHUNK_SIZE, FEATURE_SCHEMA, CSVSink, fit_vocabulary_chunked, iter_data_chunks,
+                                stream_features)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Preprocess the raw theft data in chunks.')
+    parser.add_argument('--data', default='../data/Bicycle_Thefts_Data.csv')
+    parser.add_argument('--output', default='../data/cache/features.cols',
+                        help='Output path, a directory for columnar or a file for csv')
+    parser.add_argument('--format', choices=['columnar', 'csv'], default='columnar')
+    parser.add_argument('--vocabulary', default='../models/category_vocabulary.pkl',
+                        help='Vocabulary to encode with, fitted from the data in a first pass if missing')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--with-target', action='store_true', help='Add the encoded STATUS column')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if os.path.exists(args.vocabulary):
+        vocabulary = joblib.load(args.vocabulary)
+        print(f"Using vocabulary from {args.vocabulary}")
+    else:
+        vocabulary = fit_vocabulary_chunked(iter_data_chunks(args.data, args.chunksize))
+        os.makedirs(os.path.dirname(args.vocabulary) or '.', exist_ok=True)
+        joblib.dump(vocabulary, args.vocabulary)
+        print(f"Vocabulary fitted and saved to {args.vocabulary}")
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    if args.format == 'columnar':
+        sink = ColumnarWriter(args.output, dtypes=dict(FEATURE_SCHEMA, STATUS='int8'),
+                              metadata={'source': os.path.abspath(args.data)})
+    else:
+        sink = CSVSink(args.output)
+
+    target_column = 'STATUS' if args.with_target else None
+    rows = stream_features(args.data, sink, vocabulary, args.chunksize, target_column)
+
+    # ru_maxrss is in kilobytes on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Wrote {rows} rows to {args.output} in {time.perf_counter() - start:.1f}s "
+          f"(peak memory {peak_mb:.0f} MB)")
+
+
+if __name__ == '__main__':
+    main()
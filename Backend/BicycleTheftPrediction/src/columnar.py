@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = 'schema.json'
+# Names the version directory readers use, replaced atomically on publish
+CURRENT_FILE = 'CURRENT'
+VERSION_PREFIX = 'v-'
+# Older versions are deleted after this long, so a reader that resolved one can finish
+KEEP_OLD_SECONDS = 60
+# Unpublished versions left by a crashed writer are deleted after this long
+STALE_WRITE_SECONDS = 3600
+
+
+def _current_dir(path):
+    """The published version directory of a cache, or path itself for the flat layout."""
+    try:
+        with open(os.path.join(path, CURRENT_FILE)) as f:
+            return os.path.join(path, f.read().strip())
+    except FileNotFoundError:
+        return path
+
+
+class ColumnarWriter:
+    """Write DataFrame chunks to a directory with one raw binary file per column.
+
+    Numeric columns are stored with their dtype, text and categorical columns
+    as int32 codes plus a category list kept in schema.json.
+
+    Each writer fills its own new version directory inside path. close()
+    publishes it by atomically replacing the CURRENT pointer, the same way the
+    model registry switches LIVE. Readers never see a half-written or
+    half-deleted cache, and concurrent writers never touch each other's files.
+    """
+
+    def __init__(self, path, dtypes=None, metadata=None):
+        self.path = path
+        self.dtypes = dtypes or {}
+        self.metadata = metadata or {}
+        self._columns = None
+        self._categories = {}
+        self._rows = 0
+
+        os.makedirs(path, exist_ok=True)
+        self._tmp_path = tempfile.mkdtemp(prefix=VERSION_PREFIX, dir=path)
+
+    def _column_dtype(self, name, values):
+        dtype = self.dtypes.get(name, values.dtype)
+        if isinstance(dtype, pd.CategoricalDtype) or dtype == 'category' or values.dtype == object \
+                or pd.api.types.is_string_dtype(values.dtype):
+            return 'category'
+        return np.dtype(dtype).str
+
+    def write(self, df):
+        """Append one chunk; every chunk must have the same columns."""
+        if self._columns is None:
+            self._columns = {name: self._column_dtype(name, df[name]) for name in df.columns}
+            for name, dtype in self._columns.items():
+                if dtype == 'category':
+                    self._categories[name] = {}
+
+        for name, dtype in self._columns.items():
+            if dtype == 'category':
+                mapping = self._categories[name]
+                values = df[name].astype(object).where(df[name].notna(), None)
+                for value in pd.unique(values.dropna()):
+                    mapping.setdefault(value, len(mapping))
+                array = values.map(mapping).fillna(-1).to_numpy(dtype='<i4')
+            else:
+                if np.dtype(dtype).kind in 'iub' and df[name].isna().any():
+                    # Casting would store NaN as an arbitrary integer
+                    raise ValueError(f"Column {name} has {int(df[name].isna().sum())} missing values "
+                                     f"and cannot be stored as {np.dtype(dtype).name}")
+                array = df[name].to_numpy(dtype=dtype)
+            with open(os.path.join(self._tmp_path, name + '.bin'), 'ab') as f:
+                f.write(np.ascontiguousarray(array).tobytes())
+        self._rows += len(df)
+
+    def abort(self):
+        """Delete the unpublished version, leaving the current one in place."""
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+
+    def close(self):
+        """Write the schema and publish the directory."""
+        schema = {
+            'rows': self._rows,
+            'metadata': self.metadata,
+            'columns': {
+                name: {
+                    'dtype': '<i4' if dtype == 'category' else dtype,
+                    'categories': [value.item() if hasattr(value, 'item') else value
+                                   for value in self._categories[name]] if dtype == 'category' else None
+                }
+                for name, dtype in (self._columns or {}).items()
+            }
+        }
+        with open(os.path.join(self._tmp_path, SCHEMA_FILE), 'w') as f:
+            json.dump(schema, f)
+
+        version = os.path.basename(self._tmp_path)
+        previous = os.path.basename(_current_dir(self.path))
+        fd, pointer = tempfile.mkstemp(prefix=CURRENT_FILE + '.', dir=self.path)
+        with os.fdopen(fd, 'w') as f:
+            f.write(version + '\n')
+        os.replace(pointer, os.path.join(self.path, CURRENT_FILE))
+        self._remove_old_versions({version, previous})
+
+    def _remove_old_versions(self, keep):
+        """Delete replaced versions, keeping the newest and the one it just replaced."""
+        now = time.time()
+        for name in os.listdir(self.path):
+            entry = os.path.join(self.path, name)
+            if name.endswith('.bin') or name == SCHEMA_FILE:
+                # Flat layout written before versioning, no longer read once CURRENT exists
+                try:
+                    os.remove(entry)
+                except FileNotFoundError:
+                    pass
+            elif name.startswith(VERSION_PREFIX) and name not in keep and os.path.isdir(entry):
+                published = os.path.exists(os.path.join(entry, SCHEMA_FILE))
+                if now - os.path.getmtime(entry) > (KEEP_OLD_SECONDS if published else STALE_WRITE_SECONDS):
+                    shutil.rmtree(entry, ignore_errors=True)
+
+
+def write_columnar(path, df, dtypes=None, metadata=None):
+    """Write a whole DataFrame as a columnar cache."""
+    writer = ColumnarWriter(path, dtypes, metadata)
+    writer.write(df)
+    writer.close()
+
+
+def read_schema(path):
+    """Return the schema of a columnar cache."""
+    with open(os.path.join(_current_dir(path), SCHEMA_FILE)) as f:
+        return json.load(f)
+
+
+def read_columnar(path, columns=None):
+    """Read selected columns of a columnar cache into a DataFrame.
+
+    Only the files of the requested columns are opened. Numeric columns are
+    memory-mapped read-only, categorical ones are rebuilt from their codes.
+    """
+    path = _current_dir(path)
+    schema = read_schema(path)
+    rows = schema['rows']
+    data = {}
+    for name in columns or list(schema['columns']):
+        spec = schema['columns'][name]
+        if rows:
+            values = np.memmap(os.path.join(path, name + '.bin'), dtype=spec['dtype'], mode='r', shape=(rows,))
+        else:
+            values = np.empty(0, dtype=spec['dtype'])
+        if spec['categories'] is not None:
+            values = pd.Categorical.from_codes(np.asarray(values), categories=spec['categories'])
+        data[name] = values
+    return pd.DataFrame(data)
@@ -1,16 +1,137 @@
+import os
+
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import LabelEncoder
+
+# Reserved code for categories that were not seen when the vocabulary was fitted
+UNKNOWN_CODE = -1
+
+CATEGORICAL_COLUMNS = [
+    'BIKE_MAKE', 'BIKE_MODEL', 'BIKE_TYPE', 'BIKE_COLOUR',
+    'PREMISES_TYPE', 'OCC_DOW', 'LOCATION_TYPE',
+    'HOOD_140', 'NEIGHBOURHOOD_140', 'OCC_HOUR_BIN',
+    'SEASON', 'COST_CATEGORY'
+]
+
+# Fields a prediction record must provide; the rest default to Unknown or 0
+REQUIRED_FIELDS = [
+    'BIKE_TYPE', 'PREMISES_TYPE', 'LOCATION_TYPE', 'OCC_DATE', 'OCC_DOW',
+    'OCC_HOUR', 'OCC_DOY', 'REPORT_DATE', 'HOOD_140', 'NEIGHBOURHOOD_140'
+]
+
+OPTIONAL_FIELDS = ['BIKE_MAKE', 'BIKE_MODEL', 'BIKE_SPEED', 'BIKE_COLOUR', 'BIKE_COST']
+
+# Compact dtypes for processed_features.csv: label codes, calendar fields and
+# 0/1 flags all fit in small signed ints (so UNKNOWN_CODE stays representable)
+FEATURE_SCHEMA = {
+    'BIKE_SPEED': 'float32', 'BIKE_COST': 'float32', 'OCC_HOUR': 'int8', 'OCC_DOW': 'int8',
+    'OCC_DOY': 'int16', 'OCC_DAY': 'int8', 'OCC_YEAR': 'int16', 'REPORT_DAY': 'int8',
+    'BIKE_MAKE': 'int16', 'BIKE_MODEL': 'int16', 'BIKE_TYPE': 'int8', 'BIKE_COLOUR': 'int16',
+    'PREMISES_TYPE': 'int8', 'LOCATION_TYPE': 'int8', 'HOOD_140': 'int16',
+    'NEIGHBOURHOOD_140': 'int16', 'OCC_HOUR_BIN': 'int8', 'SEASON': 'int8',
+    'COST_CATEGORY': 'int8', 'x': 'float32', 'y': 'float32', 'IS_NIGHT': 'int8', 'IS_WEEKEND': 'int8'
+}
+
+# Raw text columns are always read as strings, so a column like HOOD_140 gets
+# the same categories whether the file is read whole or in chunks
+RAW_CATEGORICAL_COLUMNS = [
+    'BIKE_MAKE', 'BIKE_MODEL', 'BIKE_TYPE', 'BIKE_COLOUR', 'PREMISES_TYPE',
+    'OCC_DOW', 'LOCATION_TYPE', 'HOOD_140', 'NEIGHBOURHOOD_140'
+]
+
+# Rows per chunk when streaming the raw CSV
+CHUNK_SIZE = 50000
+
+def _raw_dtypes(filepath):
+    columns = pd.read_csv(filepath, nrows=0).columns
+    return {col: str for col in RAW_CATEGORICAL_COLUMNS if col in columns}
+
+# Calendar lookup for ISO date strings in this range, other dates are parsed with pandas
+CALENDAR_START = '2000-01-01'
+CALENDAR_END = '2035-12-31'
+
+# Season of each month 1-12, with index 0 (missing month) falling back to Winter
+SEASON_BY_MONTH = np.array(['Winter', 'Winter', 'Winter', 'Spring', 'Spring', 'Spring', 'Summer',
+                            'Summer', 'Summer', 'Fall', 'Fall', 'Fall', 'Winter'])
+
+# Cyclical day-of-year encoding for every whole OCC_DOY value
+_DOY = np.arange(367)
+DOY_COS = np.cos(2 * np.pi * _DOY / 365)
+DOY_SIN = np.sin(2 * np.pi * _DOY / 365)
+
+_calendar = None
+
+def _calendar_table():
+    """Map 'YYYY-MM-DD' strings to rows of a (year, month, day) table, built once."""
+    global _calendar
+    if _calendar is None:
+        dates = pd.date_range(CALENDAR_START, CALENDAR_END, freq='D')
+        index = {date: i for i, date in enumerate(dates.strftime('%Y-%m-%d'))}
+        parts = np.column_stack([dates.year, dates.month, dates.day]).astype(np.int32)
+        _calendar = (index, parts)
+    return _calendar
+
+def _iso_date(value):
+    # Date-only strings, or an ISO timestamp such as '2014-01-01T05:00:00.000Z'
+    if isinstance(value, str) and (len(value) == 10 or (len(value) > 10 and value[10] in 'T ')):
+        return value[:10]
+    return None
+
+def date_parts(values, errors='raise'):
+    """Year, month and day of a Series of dates as a (rows, 3) float array.
+
+    Strings starting with an ISO date in the calendar range are resolved with
+    one dictionary lookup, the rest go through pd.to_datetime with the given
+    errors mode. Missing dates (and invalid ones with errors='coerce') give NaN.
+    """
+    index, parts = _calendar_table()
+    values = pd.Series(values)
+    out = np.full((len(values), 3), np.nan)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        missing = values.notna().to_numpy()
+    else:
+        rows = np.fromiter((index.get(_iso_date(value), -1) for value in values.to_numpy(dtype=object)),
+                           dtype=np.intp, count=len(values))
+        hit = rows >= 0
+        out[hit] = parts[rows[hit]]
+        missing = ~hit & values.notna().to_numpy()
+
+    if missing.any():
+        parsed = pd.to_datetime(values[missing], errors=errors)
+        out[missing] = np.column_stack([parsed.dt.year, parsed.dt.month, parsed.dt.day])
+    return out
+
+def _date_column(values, index):
+    # int32 like the pandas datetime accessors, float when dates are missing
+    column = pd.Series(values, index=index)
+    return column if column.isna().any() else column.astype(np.int32)
 
 def load_data(filepath):
-    return pd.read_csv(filepath)
+    return pd.read_csv(filepath, dtype=_raw_dtypes(filepath))
+
+def iter_data_chunks(filepath, chunksize=CHUNK_SIZE):
+    """Read the raw CSV in chunks of at most chunksize rows."""
+    return pd.read_csv(filepath, dtype=_raw_dtypes(filepath), chunksize=chunksize)
 
-def preprocess_features(df):
+def load_processed_features(filepath, columns=None):
+    """Read processed_features.csv with the compact dtypes from FEATURE_SCHEMA.
+
+    Pass columns to parse only the ones the caller needs.
+    """
+    dtypes = {col: FEATURE_SCHEMA[col] for col in (columns or FEATURE_SCHEMA) if col in FEATURE_SCHEMA}
+    return pd.read_csv(filepath, usecols=columns, dtype=dtypes)
+
+def memory_footprint(df):
+    """Bytes held by a DataFrame, including object column contents."""
+    return int(df.memory_usage(deep=True).sum())
+
+def _derive_features(df):
+    """Add the engineered date, time and cost columns used by the model."""
     df = df.copy()
 
-    # Convert dates to datetime
-    df['OCC_DATE'] = pd.to_datetime(df['OCC_DATE'])
-    df['REPORT_DATE'] = pd.to_datetime(df['REPORT_DATE'])
+    # Year, month and day of each date from the calendar table
+    occ_date = date_parts(df['OCC_DATE'])
+    report_date = date_parts(df['REPORT_DATE'])
 
     # Create hour bins
     df['OCC_HOUR_BIN'] = pd.cut(df['OCC_HOUR'], 
@@ -18,56 +139,105 @@ def preprocess_features(df):
                                labels=['Night','Morning','Afternoon','Evening']).astype(str)
     
     # Create season feature
-    month = pd.to_datetime(df['OCC_DATE']).dt.month
-    conditions = [
-        (month >= 3) & (month <= 5),
-        (month >= 6) & (month <= 8),
-        (month >= 9) & (month <= 11)
-    ]
-    choices = ['Spring', 'Summer', 'Fall']
-    df['SEASON'] = np.select(conditions, choices, default='Winter')
+    month = np.nan_to_num(occ_date[:, 1]).astype(int)
+    df['SEASON'] = SEASON_BY_MONTH[month]
 
     # Create cost categories
+    cost = df['BIKE_COST'].astype(float)
     conditions = [
-        df['BIKE_COST'].astype(float) <= 500,
-        (df['BIKE_COST'].astype(float) > 500) & (df['BIKE_COST'].astype(float) <= 1000),
-        (df['BIKE_COST'].astype(float) > 1000) & (df['BIKE_COST'].astype(float) <= 2000),
-        (df['BIKE_COST'].astype(float) > 2000) & (df['BIKE_COST'].astype(float) <= 5000)
+        cost <= 500,
+        (cost > 500) & (cost <= 1000),
+        (cost > 1000) & (cost <= 2000),
+        (cost > 2000) & (cost <= 5000)
     ]
     choices = ['Very Low', 'Low', 'Medium', 'High']
     df['COST_CATEGORY'] = np.select(conditions, choices, default='Very High')
     
     # Create cyclical features for day of year
-    df['x'] = np.cos(2 * np.pi * df['OCC_DOY'] / 365)
-    df['y'] = np.sin(2 * np.pi * df['OCC_DOY'] / 365)
+    df['x'], df['y'] = _doy_encoding(df['OCC_DOY'])
     
     # Create binary features
     df['IS_NIGHT'] = ((df['OCC_HOUR'] >= 20) | (df['OCC_HOUR'] <= 5)).astype(int)
     df['IS_WEEKEND'] = df['OCC_DOW'].isin(['Saturday', 'Sunday']).astype(int)
     
     # Extract date components
-    df['OCC_DAY'] = pd.to_datetime(df['OCC_DATE']).dt.day
-    df['OCC_YEAR'] = pd.to_datetime(df['OCC_DATE']).dt.year
-    df['REPORT_DAY'] = pd.to_datetime(df['REPORT_DATE']).dt.day
+    df['OCC_DAY'] = _date_column(occ_date[:, 2], df.index)
+    df['OCC_YEAR'] = _date_column(occ_date[:, 0], df.index)
+    df['REPORT_DAY'] = _date_column(report_date[:, 2], df.index)
     
     # Fill missing numerical values
     df['BIKE_SPEED'] = pd.to_numeric(df['BIKE_SPEED'], errors='coerce').fillna(0)
     df['BIKE_COST'] = pd.to_numeric(df['BIKE_COST'], errors='coerce').fillna(0)
+    return df
+
+def _doy_encoding(doy):
+    """cos and sin of the day of year, from the DOY tables for whole days in range."""
+    values = doy.to_numpy(dtype=float)
+    whole = (values >= 0) & (values <= 366) & (values == np.floor(values))
+    x = np.empty(len(values))
+    y = np.empty(len(values))
+    days = values[whole].astype(int)
+    x[whole], y[whole] = DOY_COS[days], DOY_SIN[days]
+    x[~whole] = np.cos(2 * np.pi * values[~whole] / 365)
+    y[~whole] = np.sin(2 * np.pi * values[~whole] / 365)
+    return pd.Series(x, index=doy.index), pd.Series(y, index=doy.index)
+
+def fit_vocabulary(df):
+    """Build a frozen category -> code mapping for every categorical column.
+
+    Codes follow the sorted order LabelEncoder would assign, so a model trained
+    on the old encoding stays compatible. Values missing from the mapping are
+    encoded as UNKNOWN_CODE at inference time.
+    """
+    return _vocabulary_from_values(_category_values(df))
+
+def fit_vocabulary_chunked(chunks):
+    """fit_vocabulary over an iterable of DataFrame chunks, e.g. iter_data_chunks.
+
+    Only the distinct categories are kept between chunks.
+    """
+    values = {col: set() for col in CATEGORICAL_COLUMNS}
+    for chunk in chunks:
+        for col, chunk_values in _category_values(chunk).items():
+            values[col].update(chunk_values)
+    return _vocabulary_from_values(values)
+
+def _category_values(df):
+    df = _derive_features(df)
+    return {
+        col: set(df[col].fillna('Unknown').astype(str).unique()) if col in df.columns else {'Unknown'}
+        for col in CATEGORICAL_COLUMNS
+    }
+
+def _vocabulary_from_values(values):
+    return {col: {value: code for code, value in enumerate(sorted(values[col]))} for col in CATEGORICAL_COLUMNS}
+
+def encode_categorical(values, mapping):
+    """Encode a Series of raw categories with a fitted vocabulary mapping."""
+    codes = values.fillna('Unknown').astype(str).map(mapping)
+    return codes.fillna(UNKNOWN_CODE).astype(int)
+
+def preprocess_features(df, vocabulary=None):
+    """Turn raw incident records into the model feature matrix.
+
+    When a vocabulary from fit_vocabulary is given, categories are encoded with
+    plain dictionary lookups, so a single row gets the same codes as it would
+    inside a large batch. Without one, encoders are fitted on df itself.
+    """
+    df = _derive_features(df)
+    if vocabulary is None:
+        # Only the per-request fallback needs sklearn, so the API does not import it
+        from sklearn.preprocessing import LabelEncoder
 
-    # Handle categorical features
-    categorical_columns = [
-        'BIKE_MAKE', 'BIKE_MODEL', 'BIKE_TYPE', 'BIKE_COLOUR',
-        'PREMISES_TYPE', 'OCC_DOW', 'LOCATION_TYPE',
-        'HOOD_140', 'NEIGHBOURHOOD_140', 'OCC_HOUR_BIN',
-        'SEASON', 'COST_CATEGORY'
-    ]
-    
     # Fill missing categorical values and encode
-    for col in categorical_columns:
+    for col in CATEGORICAL_COLUMNS:
         if col in df.columns:
-            df[col] = df[col].fillna('Unknown')
-            le = LabelEncoder()
-            df[col] = le.fit_transform(df[col].astype(str))
+            if vocabulary is not None:
+                df[col] = encode_categorical(df[col], vocabulary[col])
+            else:
+                df[col] = df[col].fillna('Unknown')
+                le = LabelEncoder()
+                df[col] = le.fit_transform(df[col].astype(str))
     
     # Select features in consistent order
     feature_columns = [
@@ -86,6 +256,8 @@ def preprocess_features(df):
                 df[col] = 0
             elif col in ['IS_NIGHT', 'IS_WEEKEND']:
                 df[col] = 0
+            elif vocabulary is not None:
+                df[col] = vocabulary[col].get('Unknown', UNKNOWN_CODE)
             else:
                 df[col] = 'Unknown'
                 le = LabelEncoder()
@@ -93,11 +265,95 @@ def preprocess_features(df):
     
     return df[feature_columns]
 
-def prepare_data_for_training(df, target_column='STATUS', test_size=0.2, random_state=42):
-    """Prepare data for model training by splitting into features and target."""
-    X = preprocess_features(df)
-    # Convert STATUS to binary (1 for RECOVERED, 0 for STOLEN)
-    y = pd.Series(0, index=df.index)  # Default to STOLEN (0)
+def _encode_target(df, target_column='STATUS'):
+    # 1 for RECOVERED, 0 for STOLEN (the default when there is no target column)
     if target_column in df.columns:
-        y = (df[target_column].str.upper() == 'RECOVERED').astype(int)
+        return (df[target_column].str.upper() == 'RECOVERED').astype(int)
+    return pd.Series(0, index=df.index)
+
+def stream_features(filepath, sink, vocabulary, chunksize=CHUNK_SIZE, target_column=None):
+    """Preprocess the raw CSV chunk by chunk and write each feature block to sink.
+
+    sink needs write(df), close() and abort(), e.g. columnar.ColumnarWriter or
+    CSVSink; if anything fails the sink is aborted and nothing is published.
+    Every chunk is encoded with the same fixed vocabulary, so at most one
+    chunk of raw and processed rows is in memory at a time. With target_column
+    the encoded target is written as an extra column of that name.
+    Returns the number of rows written.
+    """
+    rows = 0
+    try:
+        for chunk in iter_data_chunks(filepath, chunksize):
+            features = preprocess_features(chunk, vocabulary)
+            if target_column is not None:
+                features = features.assign(**{target_column: _encode_target(chunk, target_column).to_numpy()})
+            sink.write(features)
+            rows += len(features)
+    except BaseException:
+        sink.abort()
+        raise
+    sink.close()
+    return rows
+
+class CSVSink:
+    """Append feature chunks to a CSV file, the format of processed_features.csv."""
+
+    def __init__(self, path):
+        self.path = path
+        self._tmp_path = path + '.tmp'
+        self._header = True
+        # Start from an empty file, whatever an interrupted run left behind
+        open(self._tmp_path, 'w').close()
+
+    def write(self, df):
+        df.to_csv(self._tmp_path, mode='a', header=self._header, index=False)
+        self._header = False
+
+    def abort(self):
+        """Remove the partial file, leaving any earlier output in place."""
+        try:
+            os.remove(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        os.replace(self._tmp_path, self.path)
+
+def validate_records(df):
+    """Check raw prediction records column by column.
+
+    Returns a Series aligned with df holding the first problem found for each
+    row, or None for rows that can be passed to preprocess_features.
+    """
+    errors = pd.Series(None, index=df.index, dtype=object)
+
+    def flag(mask, message):
+        errors[mask & errors.isna()] = message
+
+    for col in REQUIRED_FIELDS:
+        if col not in df.columns:
+            flag(pd.Series(True, index=df.index), f"Missing required field: {col}")
+        else:
+            flag(df[col].isna(), f"Missing required field: {col}")
+
+    for col in ['OCC_DATE', 'REPORT_DATE']:
+        if col in df.columns:
+            parsed = date_parts(df[col], errors='coerce')
+            flag(pd.Series(np.isnan(parsed[:, 0]), index=df.index), f"Invalid date in {col}")
+
+    for col, low, high in [('OCC_HOUR', 0, 23), ('OCC_DOY', 1, 366)]:
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors='coerce')
+            flag(~values.between(low, high), f"{col} must be a number between {low} and {high}")
+
+    if 'BIKE_COST' in df.columns:
+        cost = pd.to_numeric(df['BIKE_COST'], errors='coerce')
+        flag(cost.isna() & df['BIKE_COST'].notna(), "BIKE_COST must be a number")
+
+    return errors
+
+def prepare_data_for_training(df, target_column='STATUS', test_size=0.2, random_state=42, vocabulary=None):
+    """Prepare data for model training by splitting into features and target."""
+    X = preprocess_features(df, vocabulary)
+    y = _encode_target(df, target_column)
     return X, y
@@ -1,18 +1,56 @@
 import numpy as np
 from sklearn.linear_model import LogisticRegression
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix, classification_report, roc_curve, auc, precision_recall_curve, make_scorer
-from sklearn.model_selection import cross_val_score, cross_validate
+from sklearn.model_selection import cross_val_score, cross_validate, StratifiedKFold
+from sklearn.base import clone
 from imblearn.over_sampling import SMOTE
 from imblearn.pipeline import Pipeline as ImbPipeline
 import pickle
-import matplotlib.pyplot as plt
+import threading
+from collections import OrderedDict
+import joblib
 from sklearn.preprocessing import label_binarize, StandardScaler
-from xgboost import XGBClassifier
+
+from data_preprocessing import CATEGORICAL_COLUMNS
+
+# HistGradientBoostingClassifier bins categories natively up to this many codes
+MAX_CATEGORICAL_BINS = 255
+
+class CachedSMOTE(SMOTE):
+    """SMOTE that remembers its output for data it has already resampled.
+
+    The nearest-neighbour search dominates SMOTE's cost and its result only
+    depends on the fold's training data and the sampler parameters. Every
+    model (and every hyperparameter candidate) fitted on the same fold
+    therefore reuses the first resampling instead of recomputing it.
+    """
+
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+    max_cache_entries = 16
+
+    def fit_resample(self, X, y, **params):
+        key = joblib.hash((X, y, self.get_params()))
+        with CachedSMOTE._cache_lock:
+            if key in CachedSMOTE._cache:
+                CachedSMOTE._cache.move_to_end(key)
+                return CachedSMOTE._cache[key]
+
+        resampled = super().fit_resample(X, y, **params)
+        with CachedSMOTE._cache_lock:
+            CachedSMOTE._cache[key] = resampled
+            while len(CachedSMOTE._cache) > self.max_cache_entries:
+                CachedSMOTE._cache.popitem(last=False)
+        return resampled
+
+def _take_rows(data, idx):
+    # Keep DataFrames intact, SMOTE casts synthetic rows back to their column dtypes
+    return data.iloc[idx] if hasattr(data, 'iloc') else data[idx]
 
 class BicycleTheftModel:
-    def __init__(self, model_type='random_forest', class_weight='balanced', handle_imbalance=True):
+    def __init__(self, model_type='random_forest', class_weight='balanced', handle_imbalance=True, n_jobs=-1):
         self.model_type = model_type
         self.handle_imbalance = handle_imbalance
         self.scaler = StandardScaler()
@@ -23,7 +61,7 @@ class BicycleTheftModel:
                 max_iter=5000,  
                 solver='saga',
                 random_state=42,
-                n_jobs=-1  
+                n_jobs=n_jobs
             )
         elif model_type == 'decision_tree':
             self.base_model = DecisionTreeClassifier(class_weight=class_weight, random_state=42)
@@ -35,7 +73,7 @@ class BicycleTheftModel:
                 min_samples_split=2,
                 min_samples_leaf=1,
                 random_state=42,
-                n_jobs=-1  
+                n_jobs=n_jobs
             )
         elif model_type == 'gradient_boosting':
             self.base_model = GradientBoostingClassifier(
@@ -44,28 +82,63 @@ class BicycleTheftModel:
                 max_depth=3,
                 random_state=42
             )
+        elif model_type == 'xgboost':
+            # Imported here so loading a model for serving never pulls in xgboost unless it is one
+            from xgboost import XGBClassifier
+            self.base_model = XGBClassifier(
+                n_estimators=200,
+                learning_rate=0.1,
+                max_depth=6,
+                tree_method='hist',
+                eval_metric='logloss',
+                random_state=42,
+                n_jobs=n_jobs
+            )
+        elif model_type == 'hist_gradient_boosting':
+            # Multi-threaded through OpenMP, class_weight becomes per-sample weights
+            self.base_model = HistGradientBoostingClassifier(
+                max_iter=200,
+                learning_rate=0.1,
+                max_leaf_nodes=31,
+                class_weight=class_weight,
+                early_stopping=False,
+                random_state=42
+            )
         else:
             raise ValueError(f"Unknown model type: {model_type}")
 
+        # SMOTE lives inside the pipeline, so it only ever sees training data
         if handle_imbalance:
             self.model = ImbPipeline([
-                ('smote', SMOTE(random_state=42)),
+                ('smote', CachedSMOTE(random_state=42)),
                 ('classifier', self.base_model)
             ])
         else:
             self.model = self.base_model
     
+    def set_categorical_features(self, X):
+        """Mark the label-encoded columns of X with few enough codes as native categoricals.
+
+        Only used by hist_gradient_boosting. Columns with more codes than
+        MAX_CATEGORICAL_BINS (on the current data BIKE_MAKE, BIKE_MODEL and
+        BIKE_COLOUR) stay ordinal, and the reserved
+        unknown code (negative) is treated as missing.
+        """
+        if self.model_type != 'hist_gradient_boosting' or not hasattr(X, 'columns'):
+            return self
+        mask = [bool(column in CATEGORICAL_COLUMNS and X[column].max() < MAX_CATEGORICAL_BINS) for column in X.columns]
+        self.base_model.set_params(categorical_features=mask if any(mask) else None)
+        return self
+
     def fit(self, X, y):
+        self.set_categorical_features(X)
+
         # Scale features for logistic regression
         if self.model_type == 'logistic':
             X = self.scaler.fit_transform(X)
-            
-        if self.handle_imbalance:
-            smote = SMOTE(random_state=42)
-            X_resampled, y_resampled = smote.fit_resample(X, y)
-            self.model.fit(X_resampled, y_resampled)
-        else:
-            self.model.fit(X, y)
+
+        # With handle_imbalance the pipeline's SMOTE step resamples exactly once
+        self.model.fit(X, y)
         return self
     
     def train(self, X_train, y_train):
@@ -84,12 +157,11 @@ class BicycleTheftModel:
         return self.model.predict_proba(X)
     
     def cross_validate(self, X, y, cv=5):
-        """Perform cross-validation and return scores."""
-        if self.handle_imbalance:
-            smote = SMOTE(random_state=42)
-            X_resampled, y_resampled = smote.fit_resample(X, y)
-            X, y = X_resampled, y_resampled
-            
+        """Perform cross-validation and return scores.
+
+        Resampling happens inside each training fold, so the held-out fold
+        only contains real samples.
+        """
         scoring = {
             'accuracy': 'accuracy',
             'precision_weighted': 'precision_weighted',
@@ -97,6 +169,7 @@ class BicycleTheftModel:
             'f1_weighted': 'f1_weighted'
         }
         
+        self.set_categorical_features(X)
         cv_results = cross_validate(self.model, X, y, cv=cv, scoring=scoring)
         
         return {
@@ -105,6 +178,36 @@ class BicycleTheftModel:
             'recall': (float(np.mean(cv_results['test_recall_weighted'])), float(np.std(cv_results['test_recall_weighted']))),
             'f1': (float(np.mean(cv_results['test_f1_weighted'])), float(np.std(cv_results['test_f1_weighted'])))
         }
+
+    def cv_splits(self, X, y, cv=5):
+        """Return the data and fold indices cross_validate would use.
+
+        Lets the folds be scored one by one with score_fold, e.g. in a process pool.
+        """
+        splits = list(StratifiedKFold(n_splits=cv).split(X, y))
+        return X, y, splits
+
+    def score_fold(self, X, y, train_idx, test_idx):
+        """Fit a fresh copy of the model on one fold and score it on the held-out part."""
+        self.set_categorical_features(X)
+        estimator = clone(self.model).fit(_take_rows(X, train_idx), _take_rows(y, train_idx))
+        y_pred = estimator.predict(_take_rows(X, test_idx))
+        y_true = _take_rows(y, test_idx)
+        return {
+            'accuracy': float(accuracy_score(y_true, y_pred)),
+            'precision': float(precision_score(y_true, y_pred, average='weighted', zero_division=0)),
+            'recall': float(recall_score(y_true, y_pred, average='weighted', zero_division=0)),
+            'f1': float(f1_score(y_true, y_pred, average='weighted', zero_division=0))
+        }
+
+    @staticmethod
+    def summarize_folds(fold_scores):
+        """Combine score_fold results into the (mean, std) format of cross_validate."""
+        return {
+            metric: (float(np.mean([scores[metric] for scores in fold_scores])),
+                     float(np.std([scores[metric] for scores in fold_scores])))
+            for metric in ['accuracy', 'precision', 'recall', 'f1']
+        }
     
     def evaluate(self, X_test, y_test):
         """
@@ -157,6 +260,8 @@ class BicycleTheftModel:
         metrics = self.evaluate(X_test, y_test)
         y_pred_proba = self.predict_proba(X_test)
 
+        # Only needed for training reports, never on the API's serving path
+        import matplotlib.pyplot as plt
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
 
         # ROC curve
@@ -196,7 +301,7 @@ class BicycleTheftModel:
     
     def get_feature_importance(self, feature_names):
         """Get feature importance if the model supports it."""
-        if self.model_type in ['decision_tree', 'random_forest']:
+        if self.model_type in ['decision_tree', 'random_forest', 'xgboost']:
             if self.handle_imbalance:
                 importance = self.model.named_steps['classifier'].feature_importances_
             else:
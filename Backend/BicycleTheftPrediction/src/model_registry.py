@@ -0,0 +1,101 @@
+import json
+import os
+import shutil
+import time
+
+# Files that make up one model version; the tree export is optional
+ARTIFACTS = ['best_model.pkl', 'best_model_trees.pkl', 'feature_order.pkl', 'category_vocabulary.pkl', 'metrics.json']
+LIVE_FILE = 'LIVE'
+
+
+class ModelRegistry:
+    """Versioned model artifacts under models/registry/<version>/.
+
+    A version directory is written completely under a temporary name and then
+    renamed, and the LIVE file naming the served version is replaced
+    atomically, so a reader never sees a half-published version.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def version_dir(self, version):
+        return os.path.join(self.root, version)
+
+    def versions(self):
+        """Published versions, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isdir(self.version_dir(name)) and not name.endswith('.tmp'))
+
+    def live_version(self):
+        """The version named in the LIVE file, or None if nothing was published."""
+        try:
+            with open(os.path.join(self.root, LIVE_FILE)) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version if version and os.path.isdir(self.version_dir(version)) else None
+
+    def set_live(self, version):
+        """Point LIVE at a published version."""
+        if not os.path.isdir(self.version_dir(version)):
+            raise ValueError(f"Unknown model version: {version}")
+        tmp_path = os.path.join(self.root, LIVE_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(version + '\n')
+        os.replace(tmp_path, os.path.join(self.root, LIVE_FILE))
+
+    def publish(self, artifact_paths, metrics=None, version=None, make_live=True):
+        """Copy a trained model's files into a new version and return its name.
+
+        artifact_paths maps file names from ARTIFACTS to the files to copy,
+        missing optional files are skipped. metrics is written as metrics.json.
+        """
+        version = version or time.strftime('%Y%m%d-%H%M%S')
+        if os.path.exists(self.version_dir(version)):
+            raise ValueError(f"Model version already exists: {version}")
+
+        tmp_dir = self.version_dir(version) + '.tmp'
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+        for name, path in artifact_paths.items():
+            if name not in ARTIFACTS:
+                raise ValueError(f"Not a model artifact: {name}")
+            if path is not None and os.path.exists(path):
+                shutil.copyfile(path, os.path.join(tmp_dir, name))
+        if metrics is not None:
+            with open(os.path.join(tmp_dir, 'metrics.json'), 'w') as f:
+                json.dump(dict(metrics, model_version=version), f, indent=4)
+        os.replace(tmp_dir, self.version_dir(version))
+
+        if make_live:
+            self.set_live(version)
+        return version
+
+    def metrics(self, version):
+        """The metrics.json of a version, or None if it has none."""
+        path = os.path.join(self.version_dir(version), 'metrics.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='List model versions or change the live one.')
+    parser.add_argument('--root', default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                       'models', 'registry'))
+    parser.add_argument('--set-live', metavar='VERSION')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.set_live:
+        registry.set_live(args.set_live)
+    live = registry.live_version()
+    for version in registry.versions():
+        print(f"{'*' if version == live else ' '} {version}")
@@ -0,0 +1,117 @@
+import argparse
+import os
+import resource
+import time
+from collections import deque
+from multiprocessing import Pool
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from data_preprocessing import iter_data_chunks, preprocess_features
+from tree_engine import TreeEnsemble
+
+# Model state of each pool worker, set once per process by _init_worker
+_worker = {}
+
+
+def load_scoring_model(models_dir, use_tree_engine=True):
+    """Load the best model memory-mapped, preferring the flattened tree ensemble.
+
+    The arrays stay in the page cache, so every worker process that maps the
+    same file shares one read-only copy of the trees.
+    """
+    trees_path = os.path.join(models_dir, 'best_model_trees.pkl')
+    if use_tree_engine and os.path.exists(trees_path):
+        return TreeEnsemble.load(trees_path, mmap_mode='r')
+
+    model = joblib.load(os.path.join(models_dir, 'best_model.pkl'), mmap_mode='r')
+    # The pool already uses every core, keep each worker's estimator single-threaded
+    estimator = getattr(model, 'model', model)
+    if hasattr(estimator, 'steps'):
+        estimator = estimator.steps[-1][1]
+    if hasattr(estimator, 'get_params') and 'n_jobs' in estimator.get_params():
+        estimator.set_params(n_jobs=1)
+    return model
+
+
+def _init_worker(models_dir, use_tree_engine):
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+
+    vocabulary_path = os.path.join(models_dir, 'category_vocabulary.pkl')
+    _worker['model'] = load_scoring_model(models_dir, use_tree_engine)
+    _worker['feature_order'] = joblib.load(os.path.join(models_dir, 'feature_order.pkl'))
+    _worker['vocabulary'] = joblib.load(vocabulary_path) if os.path.exists(vocabulary_path) else None
+
+
+def _score_chunk(chunk):
+    X = preprocess_features(chunk, _worker['vocabulary'])[_worker['feature_order']]
+    probabilities = _worker['model'].predict_proba(X)
+    classes = _worker['model'].classes_ if hasattr(_worker['model'], 'classes_') else np.arange(probabilities.shape[1])
+    return chunk.index.to_numpy(), probabilities, classes
+
+
+def _ordered_results(pool, chunks, max_pending):
+    """Like pool.imap, but reads the next chunk only when fewer than max_pending are in flight.
+
+    Pool.imap drains its input iterator eagerly, which would pull the whole
+    file into memory while the workers catch up.
+    """
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.apply_async(_score_chunk, (chunk,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def score_file(input_path, output_path, models_dir, n_workers, chunksize, use_tree_engine=True):
+    """Score every row of input_path and write the probabilities in input order.
+
+    Raw chunks are read in the main process and preprocessed and scored by the
+    pool. Results come back in submission order and at most two chunks per
+    worker are in flight, so memory stays bounded. Returns the number of rows scored.
+    """
+    rows = 0
+    tmp_path = output_path + '.tmp'
+    with Pool(n_workers, initializer=_init_worker, initargs=(models_dir, use_tree_engine)) as pool, \
+            open(tmp_path, 'w') as out:
+        for index, probabilities, classes in _ordered_results(
+                pool, iter_data_chunks(input_path, chunksize), 2 * n_workers):
+            scores = pd.DataFrame(probabilities, columns=[f'PROB_{label}' for label in classes])
+            scores.insert(0, 'ROW', index)
+            scores['PREDICTION'] = np.asarray(classes)[probabilities.argmax(axis=1)]
+            scores.to_csv(out, header=rows == 0, index=False, float_format='%.6f')
+            rows += len(index)
+    os.replace(tmp_path, output_path)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a CSV of incidents with the best model.')
+    parser.add_argument('input', help='Raw incident CSV with the Bicycle_Thefts_Data.csv columns')
+    parser.add_argument('output', help='CSV of row numbers, class probabilities and predictions')
+    parser.add_argument('--models-dir', default='../models')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunksize', type=int, default=20000)
+    parser.add_argument('--no-tree-engine', action='store_true', help='Score with the pickled model')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = score_file(args.input, args.output, args.models_dir, args.workers, args.chunksize,
+                      use_tree_engine=not args.no_tree_engine)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux; the children figure is the largest single worker
+    parent_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    worker_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(f"Scored {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s) "
+          f"with {args.workers} workers, results saved to {args.output}")
+    print(f"Peak memory: {parent_mb:.0f} MB main process, {worker_mb:.0f} MB largest worker")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,46 +1,143 @@
+import argparse
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from sklearn.model_selection import train_test_split
 
-from data_preprocessing import load_data, preprocess_features, prepare_data_for_training
+from data_preprocessing import load_data, preprocess_features, prepare_data_for_training, fit_vocabulary
 from model import BicycleTheftModel
+from tree_engine import export_tree_ensemble
+from model_registry import ModelRegistry
 import joblib
 
-def train_and_evaluate_models(X_train, X_test, y_train, y_test):
-    models = {
-        'logistic': {'model_type': 'logistic', 'handle_imbalance': True},
-        'decision_tree': {'model_type': 'decision_tree', 'handle_imbalance': True},
-        'random_forest': {'model_type': 'random_forest', 'handle_imbalance': True},
-        'gradient_boosting': {'model_type': 'gradient_boosting', 'handle_imbalance': True},
-    }
-    
+MODELS = {
+    'logistic': {'model_type': 'logistic', 'handle_imbalance': True},
+    'decision_tree': {'model_type': 'decision_tree', 'handle_imbalance': True},
+    'random_forest': {'model_type': 'random_forest', 'handle_imbalance': True},
+    'gradient_boosting': {'model_type': 'gradient_boosting', 'handle_imbalance': True},
+    # Balanced class weights instead of SMOTE
+    'hist_gradient_boosting': {'model_type': 'hist_gradient_boosting', 'handle_imbalance': False},
+}
+
+def print_results(name, cv_results, test_results, timing):
+    print(f"\nCross-validation results for {name}:")
+    for metric, (mean, std) in cv_results.items():
+        print(f"{metric}: {mean:.3f} (+/- {std:.3f})")
+
+    print(f"Test set results for {name}:")
+    for metric, score in test_results.items():
+        if isinstance(score, (int, float)):
+            print(f"{metric}: {score:.3f}")
+        else:
+            print(f"{metric}: {score}")
+    print(f"Training time for {name}: {timing['wall']:.1f}s wall, {timing['cpu']:.1f}s CPU")
+
+def train_and_evaluate_models(X_train, X_test, y_train, y_test, n_workers=1):
+    """Cross-validate, fit and test every model in MODELS.
+
+    With n_workers > 1 the CV folds and final fits of all models run as
+    separate tasks in a process pool of that size, see train_models_parallel.
+    """
+    if n_workers > 1:
+        return train_models_parallel(X_train, X_test, y_train, y_test, n_workers)
+
     results = {}
-    for name, params in models.items():
+    for name, params in MODELS.items():
         print(f"\nTraining {name}...")
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
         model = BicycleTheftModel(**params)
 
         cv_results = model.cross_validate(X_train, y_train)
-        print(f"Cross-validation results for {name}:")
-        for metric, (mean, std) in cv_results.items():
-            print(f"{metric}: {mean:.3f} (+/- {std:.3f})")
-
         model.fit(X_train, y_train)
         test_results = model.evaluate(X_test, y_test)
+        timing = {'wall': time.perf_counter() - start_wall, 'cpu': time.process_time() - start_cpu}
         results[name] = {
             'cv_results': cv_results,
             'test_results': test_results,
-            'model': model
+            'model': model,
+            'timing': timing
         }
-        
-        print(f"Test set results for {name}:")
-        for metric, score in test_results.items():
-            if isinstance(score, (int, float)):
-                print(f"{metric}: {score:.3f}")
-            else:
-                print(f"{metric}: {score}")
+        print_results(name, cv_results, test_results, timing)
     
     return results
 
+# Data shared with pool workers, set once per process by _init_worker
+_worker_data = {}
+
+def _init_worker(data, threads):
+    from threadpoolctl import threadpool_limits
+    _worker_data.update(data)
+    # Keep BLAS/OpenMP inside each worker within its share of the cores
+    threadpool_limits(threads)
+
+def _run_task(name, params, kind, fold):
+    # Wall-clock timestamps, comparable between the worker processes
+    started, start_cpu = time.time(), time.process_time()
+    model = BicycleTheftModel(**params)
+    if kind == 'fold':
+        X, y, splits = _worker_data['cv']
+        train_idx, test_idx = splits[fold]
+        result = model.score_fold(X, y, train_idx, test_idx)
+    else:
+        model.fit(_worker_data['X_train'], _worker_data['y_train'])
+        result = (model, model.evaluate(_worker_data['X_test'], _worker_data['y_test']))
+    return name, kind, result, started, time.time(), time.process_time() - start_cpu
+
+def train_models_parallel(X_train, X_test, y_train, y_test, n_workers, cv=5):
+    """Run every CV fold and final fit of every model as one task in a process pool.
+
+    The cores are split between the workers, so estimators that default to
+    n_jobs=-1 get threads_per_worker threads instead of all of them.
+    """
+    threads_per_worker = max(1, (os.cpu_count() or 1) // n_workers)
+
+    # SMOTE runs inside each training fold, so every model shares the same splits
+    cv_data = BicycleTheftModel().cv_splits(X_train, y_train, cv)
+
+    data = {'X_train': X_train, 'y_train': y_train, 'X_test': X_test, 'y_test': y_test, 'cv': cv_data}
+    tasks = []
+    for name, params in MODELS.items():
+        params = dict(params, n_jobs=threads_per_worker)
+        tasks.extend((name, params, 'fold', fold) for fold in range(cv))
+        tasks.append((name, params, 'fit', None))
+
+    print(f"\nTraining {len(MODELS)} models as {len(tasks)} tasks on {n_workers} workers "
+          f"({threads_per_worker} threads each)...")
+    start = time.perf_counter()
+    fold_scores = {name: [] for name in MODELS}
+    fitted = {}
+    # A model's folds run at the same time, so its wall time runs from its first task's start to its last's end
+    spans = {}
+    timing = {name: {'wall': 0.0, 'cpu': 0.0} for name in MODELS}
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                             initargs=(data, threads_per_worker)) as executor:
+        futures = [executor.submit(_run_task, *task) for task in tasks]
+        for future in as_completed(futures):
+            name, kind, result, started, finished, cpu = future.result()
+            first, last = spans.get(name, (started, finished))
+            spans[name] = (min(first, started), max(last, finished))
+            timing[name]['wall'] = spans[name][1] - spans[name][0]
+            timing[name]['cpu'] += cpu
+            if kind == 'fold':
+                fold_scores[name].append(result)
+            else:
+                fitted[name] = result
+
+    results = {}
+    for name in MODELS:
+        model, test_results = fitted[name]
+        cv_results = BicycleTheftModel.summarize_folds(fold_scores[name])
+        results[name] = {
+            'cv_results': cv_results,
+            'test_results': test_results,
+            'model': model,
+            'timing': timing[name]
+        }
+        print_results(name, cv_results, test_results, timing[name])
+    print(f"\nParallel training finished in {time.perf_counter() - start:.1f}s")
+    return results
+
 def select_best_model(results):
     best_score = -1
     best_name = None
@@ -56,13 +153,23 @@ def select_best_model(results):
     return best_name, best_model, best_score
 
 def main():
+    parser = argparse.ArgumentParser(description='Train and compare the bicycle theft models.')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Worker processes for training; above 1, models and CV folds train in parallel')
+    args = parser.parse_args()
+
     if not os.path.exists('../models'):
         os.makedirs('../models')
 
     # Load and prepare data
     print("Loading and preparing data...")
     data = load_data('../data/Bicycle_Thefts_Data.csv')
-    X, y = prepare_data_for_training(data)  # This will properly convert STATUS to binary
+
+    # Freeze the category codes so inference never refits the encoders
+    vocabulary = fit_vocabulary(data)
+    joblib.dump(vocabulary, '../models/category_vocabulary.pkl')
+
+    X, y = prepare_data_for_training(data, vocabulary=vocabulary)  # This will properly convert STATUS to binary
 
     # Split the data
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
@@ -75,7 +182,7 @@ def main():
     print(f"Testing set shape: {X_test.shape}")
     
     print("\nTraining and evaluating models...")
-    results = train_and_evaluate_models(X_train, X_test, y_train, y_test)
+    results = train_and_evaluate_models(X_train, X_test, y_train, y_test, n_workers=args.jobs)
     
     best_name, best_model, best_score = select_best_model(results)
     print(f"\nBest model: {best_name} (F1-score: {best_score:.3f})")
@@ -84,5 +191,37 @@ def main():
     joblib.dump(best_model, model_path)
     print(f"\nBest model saved to {model_path}")
 
+    # Flattened copy of tree models for fast inference in the API
+    trees_path = '../models/best_model_trees.pkl'
+    try:
+        export_tree_ensemble(best_model, trees_path)
+        print(f"Tree ensemble saved to {trees_path}")
+    except ValueError as e:
+        if os.path.exists(trees_path):
+            os.remove(trees_path)
+        print(f"Skipping tree ensemble export: {e}")
+
+    # Publish a new version for the API to pick up on reload
+    test_results = results[best_name]['test_results']
+    metrics = {
+        'model_name': best_name,
+        'accuracy': test_results['accuracy'],
+        'precision': test_results['precision'],
+        'recall': test_results['recall'],
+        'f1_score': test_results['f1'],
+        'confusion_matrix': test_results['confusion_matrix'].tolist(),
+        'roc_auc': float(test_results['roc_auc']),
+        'training_time': results[best_name]['timing']['wall'],
+        'training_date': time.strftime('%Y-%m-%d %H:%M:%S')
+    }
+    registry = ModelRegistry('../models/registry')
+    version = registry.publish({
+        'best_model.pkl': model_path,
+        'best_model_trees.pkl': trees_path,
+        'feature_order.pkl': '../models/feature_order.pkl',
+        'category_vocabulary.pkl': '../models/category_vocabulary.pkl'
+    }, metrics)
+    print(f"Published model version {version} to {registry.root}")
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,159 @@
+import os
+
+import joblib
+import numpy as np
+
+# Rows scored per traversal pass, bounds the (rows x trees) node index matrix
+CHUNK_SIZE = 4096
+
+
+def _unwrap_classifier(model):
+    """Return the fitted sklearn estimator inside a BicycleTheftModel or pipeline."""
+    if hasattr(model, 'model_type') and hasattr(model, 'model'):
+        if model.model_type == 'logistic':
+            raise ValueError("Logistic regression models are not tree ensembles")
+        model = model.model
+    if hasattr(model, 'steps'):
+        model = model.steps[-1][1]
+    return model
+
+
+class TreeEnsemble:
+    """Fitted tree ensemble flattened into contiguous NumPy arrays.
+
+    All trees share one set of node arrays. Leaf nodes point to themselves,
+    so every row can walk every tree for max_depth steps in lockstep without
+    checking which rows have already reached a leaf.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth,
+                 classes, kind, init_score=0.0):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.kind = kind
+        self.init_score = float(init_score)
+
+    @classmethod
+    def from_model(cls, model):
+        """Flatten a fitted random forest, decision tree or gradient boosting classifier."""
+        # Imported here so serving a flattened model never loads sklearn
+        from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+        from sklearn.tree import DecisionTreeClassifier
+
+        estimator = _unwrap_classifier(model)
+
+        if isinstance(estimator, DecisionTreeClassifier):
+            trees, kind, scale = [estimator.tree_], 'average', 1.0
+        elif isinstance(estimator, RandomForestClassifier):
+            trees, kind, scale = [tree.tree_ for tree in estimator.estimators_], 'average', 1.0
+        elif isinstance(estimator, GradientBoostingClassifier):
+            if estimator.estimators_.shape[1] != 1:
+                raise ValueError("Only binary gradient boosting models are supported")
+            trees = [tree.tree_ for tree in estimator.estimators_[:, 0]]
+            kind, scale = 'boosting', estimator.learning_rate
+        else:
+            raise ValueError(f"Unsupported model: {type(estimator).__name__}")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+
+            if kind == 'average':
+                # Same normalisation as DecisionTreeClassifier.predict_proba
+                proba = tree.value[:, 0, :].copy()
+                normalizer = proba.sum(axis=1, keepdims=True)
+                normalizer[normalizer == 0.0] = 1.0
+                values.append(proba / normalizer)
+            else:
+                values.append(scale * tree.value[:, 0, :1])
+
+            roots.append(offset)
+            offset += tree.node_count
+
+        init_score = 0.0
+        if kind == 'boosting':
+            # The prior is constant per row, so evaluate it once on a dummy row
+            dummy = np.zeros((1, estimator.n_features_in_), dtype=np.float32)
+            init_score = estimator._raw_predict_init(dummy)[0, 0]
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max(tree.max_depth for tree in trees),
+            classes=np.asarray(estimator.classes_),
+            kind=kind,
+            init_score=init_score
+        )
+
+    def _leaves(self, X):
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.repeat(self.roots[None, :], X.shape[0], axis=0)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict_proba(self, X):
+        """Class probabilities for 1 to N rows, matching sklearn's predict_proba."""
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        out = []
+        for start in range(0, X.shape[0], CHUNK_SIZE):
+            leaf_values = self.value[self._leaves(X[start:start + CHUNK_SIZE])]
+            if self.kind == 'average':
+                out.append(leaf_values.mean(axis=1))
+            else:
+                raw = self.init_score + leaf_values.sum(axis=1)[:, 0]
+                recovered = 1.0 / (1.0 + np.exp(-raw))
+                out.append(np.column_stack([1.0 - recovered, recovered]))
+        if not out:
+            return np.empty((0, len(self.classes_)))
+        return np.concatenate(out)
+
+    def predict(self, X):
+        """Predicted class labels."""
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def save(self, filepath):
+        """Save the flattened arrays with joblib."""
+        state = dict(self.__dict__)
+        state['classes'] = state.pop('classes_')
+        joblib.dump(state, filepath)
+
+    @classmethod
+    def load(cls, filepath, mmap_mode=None):
+        """Load a saved ensemble, optionally memory-mapping its arrays."""
+        return cls(**joblib.load(filepath, mmap_mode=mmap_mode))
+
+
+def export_tree_ensemble(model, filepath):
+    """Flatten a fitted model and save it next to the pickled one."""
+    ensemble = TreeEnsemble.from_model(model)
+    ensemble.save(filepath)
+    return ensemble
+
+
+if __name__ == '__main__':
+    models_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+    export_tree_ensemble(joblib.load(os.path.join(models_dir, 'best_model.pkl')),
+                         os.path.join(models_dir, 'best_model_trees.pkl'))
+    print(f"Tree ensemble saved to {os.path.join(models_dir, 'best_model_trees.pkl')}")
@@ -0,0 +1,199 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+from scipy.stats import loguniform, randint, uniform
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+from sklearn.model_selection import HalvingRandomSearchCV, train_test_split
+from sklearn.preprocessing import StandardScaler
+from imblearn.pipeline import Pipeline as ImbPipeline
+
+from data_preprocessing import load_data, prepare_data_for_training, fit_vocabulary
+from model import BicycleTheftModel
+
+# Search spaces over BicycleTheftModel.model, mostly its 'classifier' step
+PARAM_SPACES = {
+    'logistic': {
+        'classifier__C': loguniform(1e-3, 1e2),
+    },
+    'decision_tree': {
+        'classifier__max_depth': [None, 5, 10, 20, 40],
+        'classifier__min_samples_split': randint(2, 40),
+        'classifier__min_samples_leaf': randint(1, 20),
+        'classifier__criterion': ['gini', 'entropy'],
+    },
+    'random_forest': {
+        'classifier__n_estimators': randint(50, 400),
+        'classifier__max_depth': [None, 10, 20, 30],
+        'classifier__min_samples_leaf': randint(1, 10),
+        'classifier__max_features': ['sqrt', 'log2', 0.5],
+    },
+    'gradient_boosting': {
+        'classifier__n_estimators': randint(50, 400),
+        'classifier__learning_rate': loguniform(0.01, 0.3),
+        'classifier__max_depth': randint(2, 6),
+        'classifier__subsample': uniform(0.6, 0.4),
+    },
+    'xgboost': {
+        'classifier__n_estimators': randint(100, 600),
+        'classifier__learning_rate': loguniform(0.01, 0.3),
+        'classifier__max_depth': randint(3, 10),
+        'classifier__subsample': uniform(0.6, 0.4),
+        'classifier__colsample_bytree': uniform(0.5, 0.5),
+        'classifier__min_child_weight': loguniform(0.5, 20),
+    },
+    # Not wrapped in the SMOTE pipeline, so the parameters have no step prefix
+    'hist_gradient_boosting': {
+        'max_iter': randint(100, 500),
+        'learning_rate': loguniform(0.01, 0.3),
+        'max_leaf_nodes': randint(15, 127),
+        'min_samples_leaf': randint(5, 100),
+        'l2_regularization': loguniform(1e-4, 10),
+    },
+}
+
+
+def file_hash(filepath, chunk_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_features_cached(data_path, cache_dir):
+    """Return X, y and the vocabulary for a raw CSV, reusing a cached copy.
+
+    The cache is keyed by the hash of the CSV contents, so repeated searches
+    over the same data skip reading and preprocessing it with pandas.
+    """
+    key = file_hash(data_path)[:16]
+    cache_path = os.path.join(cache_dir, f'features_{key}.pkl')
+    if os.path.exists(cache_path):
+        print(f"Using cached features from {cache_path}")
+        return joblib.load(cache_path) + (key,)
+
+    data = load_data(data_path)
+    vocabulary = fit_vocabulary(data)
+    X, y = prepare_data_for_training(data, vocabulary=vocabulary)
+    os.makedirs(cache_dir, exist_ok=True)
+    joblib.dump((X, y, vocabulary), cache_path)
+    return X, y, vocabulary, key
+
+
+def search_estimator(model_type, X=None):
+    """The pipeline to search over, with scaling inside it for logistic regression."""
+    # One thread per candidate, the search itself runs candidates in parallel
+    # hist_gradient_boosting weights the classes instead of resampling with SMOTE
+    model = BicycleTheftModel(model_type=model_type, handle_imbalance=model_type != 'hist_gradient_boosting', n_jobs=1)
+    if X is not None:
+        model.set_categorical_features(X)
+    if model_type == 'logistic':
+        steps = model.model.steps if hasattr(model.model, 'steps') else [('classifier', model.model)]
+        return ImbPipeline([('scaler', StandardScaler())] + steps)
+    return model.model
+
+
+def min_resources(y, cv=5, k_neighbors=5):
+    """Smallest subsample whose CV training folds still hold enough minority
+    samples for SMOTE's neighbour search (with a 2x margin)."""
+    minority_fraction = np.bincount(np.asarray(y)).min() / len(y)
+    needed = int(np.ceil(2 * cv * (k_neighbors + 1) / minority_fraction))
+    return min(len(y), needed)
+
+
+def tune(model_type, X, y, n_jobs=-1, factor=3, cv=5, random_state=42):
+    """Successive-halving random search over the model type's parameter space.
+
+    Early iterations score many candidates on small subsamples, only the best
+    third (with factor=3) moves on to three times as many samples.
+    """
+    search = HalvingRandomSearchCV(
+        search_estimator(model_type, X),
+        PARAM_SPACES[model_type],
+        factor=factor,
+        resource='n_samples',
+        min_resources=min_resources(y, cv),
+        n_candidates='exhaust',
+        cv=cv,
+        scoring='f1_weighted',
+        n_jobs=n_jobs,
+        random_state=random_state,
+        refit=True
+    )
+    search.fit(X, y)
+    return search
+
+
+def summarize_search(search, top=10):
+    """JSON-friendly summary of a finished search."""
+    results = search.cv_results_
+    order = sorted(range(len(results['params'])), key=lambda i: results['rank_test_score'][i])[:top]
+    return {
+        'best_params': {name.split('__')[-1]: value for name, value in search.best_params_.items()},
+        'best_cv_f1': float(search.best_score_),
+        'n_candidates': [int(n) for n in search.n_candidates_],
+        'n_resources': [int(n) for n in search.n_resources_],
+        'top_candidates': [
+            {
+                'params': {name.split('__')[-1]: value for name, value in results['params'][i].items()},
+                'mean_f1': float(results['mean_test_score'][i]),
+                'std_f1': float(results['std_test_score'][i]),
+                'iteration': int(results['iter'][i])
+            }
+            for i in order
+        ]
+    }
+
+
+def _to_json(value):
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tune model hyperparameters with successive halving.')
+    parser.add_argument('--models', nargs='+', default=list(PARAM_SPACES), choices=list(PARAM_SPACES))
+    parser.add_argument('--data', default='../data/Bicycle_Thefts_Data.csv')
+    parser.add_argument('--cache-dir', default='../data/cache')
+    parser.add_argument('--output-dir', default='../models')
+    parser.add_argument('--jobs', type=int, default=-1, help='Parallel candidate fits (-1 for all cores)')
+    parser.add_argument('--factor', type=int, default=3, help='Halving factor between iterations')
+    args = parser.parse_args()
+
+    X, y, _, data_key = load_features_cached(args.data, args.cache_dir)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    for model_type in args.models:
+        print(f"\nTuning {model_type}...")
+        start = time.perf_counter()
+        search = tune(model_type, X_train, y_train, n_jobs=args.jobs, factor=args.factor)
+        summary = summarize_search(search)
+        summary['search_time'] = time.perf_counter() - start
+        summary['data_hash'] = data_key
+
+        # Score the refitted best candidate on the held-out split
+        y_pred = search.best_estimator_.predict(X_test)
+        summary['test_results'] = {
+            'accuracy': float(accuracy_score(y_test, y_pred)),
+            'precision': float(precision_score(y_test, y_pred, average='weighted', zero_division=0)),
+            'recall': float(recall_score(y_test, y_pred, average='weighted', zero_division=0)),
+            'f1': float(f1_score(y_test, y_pred, average='weighted', zero_division=0))
+        }
+
+        output_path = os.path.join(args.output_dir, f'{model_type}_tuning.json')
+        with open(output_path, 'w') as f:
+            json.dump(summary, f, indent=4, default=_to_json)
+        print(f"Best F1 for {model_type}: {summary['best_cv_f1']:.3f} "
+              f"({summary['search_time']:.1f}s), results saved to {output_path}")
+
+
+if __name__ == '__main__':
+    main()
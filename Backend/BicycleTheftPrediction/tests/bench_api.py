@@ -0,0 +1,249 @@
+"""In-process benchmarks for the API, preprocessing, spatial lookup and training.
+
+Not collected by pytest. Run from the repository root:
+
+    python tests/bench_api.py --output bench.json
+    python tests/bench_api.py --output new.json --compare bench.json
+
+Records are generated from api/unique_values.json with a fixed seed, so two
+runs on the same machine measure the same work.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(base_dir, 'src'))
+sys.path.append(os.path.join(base_dir, 'api'))
+
+# Measure the model path, not the prediction cache, unless asked otherwise
+os.environ.setdefault('PREDICTION_CACHE_SIZE', '0')
+
+# Toronto's bounding box, for random /neighbourhood points
+TORONTO_BOUNDS = {'lat': (43.58, 43.86), 'lon': (-79.64, -79.11)}
+GROUPS = ['api', 'preprocessing', 'spatial', 'dashboard', 'training']
+
+
+def synthetic_records(n, seed=0):
+    """Random prediction records drawn from the options in unique_values.json."""
+    with open(os.path.join(base_dir, 'api', 'unique_values.json')) as f:
+        options = json.load(f)
+    rng = np.random.default_rng(seed)
+
+    def pick(field):
+        return [options[field][i] for i in rng.integers(0, len(options[field]), n)]
+
+    hoods = rng.integers(0, len(options['HOOD_140']), n)
+    dates = pd.Timestamp('2014-01-01') + pd.to_timedelta(rng.integers(0, 3650, n), unit='D')
+    delays = pd.to_timedelta(rng.integers(0, 10, n), unit='D')
+    columns = {field: pick(field) for field in
+               ['BIKE_MAKE', 'BIKE_MODEL', 'BIKE_TYPE', 'BIKE_SPEED', 'BIKE_COLOUR', 'PREMISES_TYPE', 'LOCATION_TYPE']}
+    return [
+        dict({field: values[i] for field, values in columns.items()},
+             BIKE_COST=float(rng.choice([0, 300, 800, 1500, 4000])),
+             OCC_DATE=dates[i].strftime('%Y-%m-%d'),
+             OCC_DOW=dates[i].day_name(),
+             OCC_HOUR=int(rng.integers(0, 24)),
+             OCC_DOY=int(dates[i].dayofyear),
+             REPORT_DATE=(dates[i] + delays[i]).strftime('%Y-%m-%d'),
+             HOOD_140=options['HOOD_140'][hoods[i]],
+             NEIGHBOURHOOD_140=options['NEIGHBOURHOOD_140'][hoods[i]])
+        for i in range(n)
+    ]
+
+
+def measure(fn, repeat, warmup=1):
+    """Run fn warmup + repeat times and summarize the timed runs in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    median = statistics.median(samples)
+    return {
+        'repeat': repeat,
+        'mean_ms': round(statistics.fmean(samples), 4),
+        'median_ms': round(median, 4),
+        'p95_ms': round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 4),
+        'min_ms': round(samples[0], 4),
+        'ops_per_s': round(1000 / median, 2) if median else None
+    }
+
+
+def measure_endpoint(results, name, call, repeat):
+    """measure() an API call, skipping the benchmark if it does not answer 200.
+
+    Every timed call is checked too, so an error response is never recorded
+    as a fast result.
+    """
+    response = call()
+    if response.status_code != 200:
+        print(f"Skipping {name}: status {response.status_code} {response.get_data(as_text=True)[:200]}")
+        return
+
+    def checked():
+        status = call().status_code
+        assert status == 200, f"{name} returned {status}"
+
+    results[name] = measure(checked, repeat)
+
+
+def bench_api(results, scale):
+    import app as api_app
+    if not api_app.model_store.available():
+        print("Skipping API benchmarks: no trained model in models/")
+        return
+    client = api_app.app.test_client()
+    records = synthetic_records(2000, seed=1)
+    singles = iter(records * 100)
+
+    def predict_one():
+        assert client.post('/predict', json=next(singles)).status_code == 200
+
+    results['api./predict'] = measure(predict_one, 200 // scale)
+    for size in (100, 1000):
+        batch = records[:size]
+        measure_endpoint(results, f'api./predict/batch[{size}]',
+                         lambda: client.post('/predict/batch', json=batch), max(3, 20 // scale))
+
+
+def bench_preprocessing(results, scale):
+    import joblib
+    from data_preprocessing import fit_vocabulary, preprocess_features
+    records = pd.DataFrame(synthetic_records(10000, seed=2))
+    vocabulary_path = os.path.join(base_dir, 'models', 'category_vocabulary.pkl')
+    vocabulary = joblib.load(vocabulary_path) if os.path.exists(vocabulary_path) else fit_vocabulary(records)
+
+    for rows, repeat in ((1, 200), (100, 50), (10000, 5)):
+        df = records.iloc[:rows]
+        results[f'preprocess_features[{rows}]'] = measure(
+            lambda: preprocess_features(df, vocabulary), max(3, repeat // scale))
+
+
+def bench_spatial(results, scale):
+    from rtree_search import RTree
+    rtree = RTree()
+    rng = np.random.default_rng(3)
+    lats = rng.uniform(*TORONTO_BOUNDS['lat'], 10000)
+    lons = rng.uniform(*TORONTO_BOUNDS['lon'], 10000)
+    points = iter(list(zip(lats, lons)) * 10)
+
+    results['RTree.search'] = measure(lambda: rtree.search(*next(points)), 2000 // scale)
+    results['RTree.search_many[10000]'] = measure(lambda: rtree.search_many(lats, lons), max(3, 10 // scale))
+
+
+def bench_dashboard(results, scale):
+    import app as api_app
+    client = api_app.app.test_client()
+    for endpoint in ['/api/thefts-over-time', '/api/return-rate', '/api/seasonal-analysis',
+                     '/api/time-analysis', '/api/value-analysis', '/api/model-metrics']:
+        measure_endpoint(results, f'api.{endpoint}', lambda: client.get(endpoint), max(5, 50 // scale))
+
+
+def bench_training(results, scale):
+    from data_preprocessing import fit_vocabulary, preprocess_features
+    from model import BicycleTheftModel, CachedSMOTE
+    from train_model import MODELS
+    records = pd.DataFrame(synthetic_records(4000 // scale, seed=4))
+    X = preprocess_features(records, fit_vocabulary(records))
+    # About as imbalanced as the real data's RECOVERED share, with a floor for SMOTE
+    y = pd.Series((np.random.default_rng(5).random(len(X)) < 0.05).astype(int), index=X.index)
+
+    def fit(params):
+        # Every fit resamples, instead of reusing the SMOTE output of the model timed before it
+        CachedSMOTE._cache.clear()
+        BicycleTheftModel(**params).fit(X, y)
+
+    # Three runs at least, so the regression gate compares medians rather than single samples
+    for name, params in MODELS.items():
+        results[f'fit.{name}'] = measure(lambda: fit(params), 3, warmup=0)
+
+
+BENCHMARKS = {
+    'api': bench_api,
+    'preprocessing': bench_preprocessing,
+    'spatial': bench_spatial,
+    'dashboard': bench_dashboard,
+    'training': bench_training
+}
+
+
+def compare(results, baseline, threshold):
+    """Print the median change per benchmark and return the names that got slower than threshold."""
+    regressions = []
+    print(f"\n{'benchmark':40s} {'baseline ms':>12s} {'current ms':>12s} {'change':>8s}")
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['median_ms'], stats['median_ms']
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:40s} {before:12.3f} {after:12.3f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the in-process benchmarks.')
+    parser.add_argument('--only', nargs='+', choices=GROUPS, default=GROUPS)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON from an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative slowdown of the median that counts as a regression')
+    parser.add_argument('--quick', action='store_true', help='Fewer repetitions and smaller training sets')
+    args = parser.parse_args()
+
+    scale = 5 if args.quick else 1
+    results = {}
+    for group in args.only:
+        print(f"Running {group} benchmarks...")
+        BENCHMARKS[group](results, scale)
+
+    import sklearn
+    report = {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'scikit-learn': sklearn.__version__,
+            'quick': args.quick
+        },
+        'results': results
+    }
+
+    print(f"\n{'benchmark':40s} {'median ms':>10s} {'p95 ms':>10s} {'ops/s':>10s}")
+    for name, stats in results.items():
+        print(f"{name:40s} {stats['median_ms']:10.3f} {stats['p95_ms']:10.3f} {stats['ops_per_s'] or 0:10.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
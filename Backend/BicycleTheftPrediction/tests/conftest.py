@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Make the flat src/ and api/ modules importable the same way app.py does
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(base_dir, 'src'))
+sys.path.append(os.path.join(base_dir, 'api'))
@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from analytics import METRICS, AnalyticsCube
+
+
+def make_features(n, seed):
+    """A processed_features-like frame with missing, zero and pre-2014 rows."""
+    rng = np.random.default_rng(seed)
+    cost = rng.gamma(2.0, 600.0, n).round(0)
+    cost[rng.random(n) < 0.1] = 0
+    cost[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        'OCC_YEAR': rng.integers(2010, 2024, n),
+        'SEASON': rng.choice(4, n, p=[0.2, 0.25, 0.4, 0.15]),
+        'OCC_HOUR': rng.integers(0, 24, n),
+        'BIKE_COST': cost,
+        'HOOD_140': rng.integers(1, 141, n),
+    })
+
+
+def baseline_metrics(df):
+    """The per-request pandas computations the dashboard endpoints used before the cube."""
+    df = df[df['OCC_YEAR'] >= 2014].copy()
+    theft_counts = df['OCC_YEAR'].value_counts().sort_index()
+    growth_rate = (theft_counts[theft_counts.index[-1]] - theft_counts[2014]) / theft_counts[2014] * 100
+
+    seasons = df['SEASON'].map({0: 'Fall', 1: 'Spring', 2: 'Summer', 3: 'Winter'})
+    seasonal_stats = seasons.value_counts()
+    seasonal_percentages = (seasonal_stats / len(df) * 100).round(1)
+
+    hour = df['OCC_HOUR']
+    period = np.select([(hour >= 6) & (hour < 12), (hour >= 12) & (hour < 18), (hour >= 18) & (hour < 24)],
+                       ['Morning (6AM-12PM)', 'Afternoon (12PM-6PM)', 'Evening (6PM-12AM)'],
+                       default='Night (12AM-6AM)')
+    time_stats = pd.Series(period).value_counts()
+    time_percentages = (time_stats / len(df) * 100).round(1)
+
+    priced = df[df['BIKE_COST'].notna() & (df['BIKE_COST'] > 0)]
+    value_stats = pd.cut(priced['BIKE_COST'], bins=[0, 500, 1000, 2000, float('inf')],
+                         labels=['$0-500', '$501-1000', '$1001-2000', '$2000+']).value_counts()
+    value_percentages = (value_stats / len(priced) * 100).round(1)
+
+    return {
+        'thefts_over_time': {'total_thefts': len(df), 'growth_rate': round(float(growth_rate), 1),
+                             'latest_year': int(theft_counts.index[-1])},
+        'seasonal_analysis': {'peak_season': str(seasonal_stats.index[0]),
+                              'peak_percentage': float(seasonal_percentages.iloc[0]),
+                              'seasonal_distribution': {season: float(percentage)
+                                                        for season, percentage in seasonal_percentages.items()}},
+        'time_analysis': {'peak_period': time_stats.index[0], 'peak_percentage': float(time_percentages.iloc[0]),
+                          'safest_period': time_stats.index[-1],
+                          'safest_percentage': float(time_percentages.iloc[-1])},
+        'value_analysis': {'average_cost': round(float(priced['BIKE_COST'].mean()), 2),
+                           'most_common_range': str(value_stats.index[0]),
+                           'most_common_percentage': float(value_percentages.iloc[0])},
+    }
+
+
+def test_cube_metrics_match_per_request_computation(tmp_path):
+    """Every dashboard metric from the cube equals the original pandas computation on the raw rows."""
+    df = make_features(20000, seed=0)
+    path = tmp_path / 'processed_features.csv'
+    df.to_csv(path, index=False)
+
+    cube = AnalyticsCube(str(path))
+    expected = baseline_metrics(df)
+    for name in METRICS:
+        assert cube.metric(name) == expected[name], name
+    # Dict order is part of the response, e.g. the seasonal distribution is sorted by count
+    assert list(cube.metric('seasonal_analysis')['seasonal_distribution']) == \
+        list(expected['seasonal_analysis']['seasonal_distribution'])
+
+
+def test_cube_is_rebuilt_when_file_changes(tmp_path):
+    """A new size or a new mtime rebuilds the cube; an untouched file is served from memory."""
+    path = tmp_path / 'processed_features.csv'
+    make_features(5000, seed=1).to_csv(path, index=False)
+    cube = AnalyticsCube(str(path))
+    first = cube.metric('thefts_over_time')
+    assert cube.metric('thefts_over_time') is first
+
+    # Different size
+    grown = make_features(6000, seed=1)
+    grown.to_csv(path, index=False)
+    assert cube.metric('thefts_over_time') == baseline_metrics(grown)['thefts_over_time']
+
+    # Fall and Summer swapped: same size, only the mtime tells the files apart
+    stat = os.stat(path)
+    swapped = grown.assign(SEASON=grown['SEASON'].replace({0: 2, 2: 0}))
+    swapped.to_csv(path, index=False)
+    assert os.stat(path).st_size == stat.st_size
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cube.metric('seasonal_analysis') == baseline_metrics(swapped)['seasonal_analysis']
+    assert cube.metric('seasonal_analysis')['peak_season'] == 'Fall'
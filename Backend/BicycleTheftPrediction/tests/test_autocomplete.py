@@ -0,0 +1,42 @@
+import pandas as pd
+
+from autocomplete import AutocompleteIndex, CategoryNormalizer
+
+
+def test_suggestions_rank_prefixes_by_frequency_then_fuzzy():
+    """Prefix hits rank by frequency, typos fall back to trigram matches."""
+    index = AutocompleteIndex.build({
+        'BIKE_MAKE': {'TREK': 90, 'TR': 40, 'TREKK': 0, 'trek ': 3, 'SPECIALIZED': 80, 'SPECIAL': 0}
+    })
+
+    suggestions = index.suggest('BIKE_MAKE', 'tr', limit=3)
+    assert [s['value'] for s in suggestions] == ['TREK', 'TR', 'TREKK']
+    assert suggestions[0]['count'] == 93 and suggestions[0]['match'] == 'prefix'
+
+    fuzzy = index.suggest('BIKE_MAKE', 'specialzed', limit=2)
+    assert fuzzy[0]['value'] == 'SPECIALIZED' and fuzzy[0]['match'] == 'fuzzy'
+
+
+def test_normalization_targets_the_model_vocabulary():
+    """Exact vocabulary values are kept, others map onto vocabulary categories only."""
+    index = AutocompleteIndex.build({'BIKE_MAKE': {'TREK': 90, 'TREKK': 50, 'SPECIALIZED': 80}})
+    vocabulary = {
+        'BIKE_MAKE': {'SPECIALIZED': 0, 'TREK': 1, 'Unknown': 2},
+        'BIKE_MODEL': {'FX 3': 0, 'UNKNOWN': 1, 'Unknown': 2}
+    }
+    normalizer = CategoryNormalizer(vocabulary, index)
+
+    # 'Unknown' is what preprocessing fills for a missing field, it must stay as typed
+    assert normalizer.normalize('BIKE_MODEL', 'Unknown') == 'Unknown'
+    assert normalizer.normalize('BIKE_MODEL', 'UNKNOWN') == 'UNKNOWN'
+    assert normalizer.normalize('BIKE_MODEL', ' fx  3') == 'FX 3'
+    # Near matches are only suggestions, TREKK is not replaced by TREK
+    assert normalizer.normalize('BIKE_MAKE', 'Trekk') == 'Trekk'
+    assert normalizer.normalize('BIKE_MAKE', 'zzzz') == 'zzzz'
+    assert normalizer.normalize_record({'BIKE_MAKE': 'specialized ', 'BIKE_TYPE': 'rg'}) == \
+        {'BIKE_MAKE': 'SPECIALIZED', 'BIKE_TYPE': 'rg'}
+
+    df = pd.DataFrame({'BIKE_MAKE': ['trek', 'Unknown', None, 'Trekk', 'trek'], 'BIKE_MODEL': ['fx 3'] * 5})
+    normalizer.normalize_frame(df)
+    assert df['BIKE_MAKE'].fillna('').tolist() == ['TREK', 'Unknown', '', 'Trekk', 'TREK']
+    assert df['BIKE_MODEL'].tolist() == ['FX 3'] * 5
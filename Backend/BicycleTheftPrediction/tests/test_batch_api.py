@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+import app
+
+RECORD = {
+    "BIKE_MAKE": "TREK", "BIKE_MODEL": "FX3", "BIKE_TYPE": "RG", "BIKE_SPEED": 21,
+    "BIKE_COLOUR": "BLK", "BIKE_COST": 800, "PREMISES_TYPE": "House",
+    "LOCATION_TYPE": "Apartment (Rooming House, Condo)", "OCC_DATE": "2023-01-01",
+    "OCC_DOW": "Sunday", "OCC_HOUR": 14, "OCC_DOY": 1, "REPORT_DATE": "2023-01-02",
+    "HOOD_140": "080", "NEIGHBOURHOOD_140": "Palmerston-Little Italy (80)"
+}
+
+pytestmark = pytest.mark.skipif(not app.model_store.available(), reason="no trained model in models/")
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+def test_batch_accepts_list_and_records_object(client):
+    """A bare JSON list and {"records": [...]} give the same results."""
+    records = [RECORD, dict(RECORD, BIKE_COST=2500, OCC_HOUR=23)]
+    as_list = client.post('/predict/batch', json=records)
+    as_object = client.post('/predict/batch', json={'records': records})
+    assert as_list.status_code == as_object.status_code == 200
+    assert as_list.get_json() == as_object.get_json()
+    body = as_list.get_json()
+    assert body['total'] == 2 and body['failed'] == 0
+    assert [result['index'] for result in body['results']] == [0, 1]
+    assert all(result['status'] in ('STOLEN', 'RECOVERED') for result in body['results'])
+
+
+def test_batch_reports_bad_records_individually(client):
+    """Non-objects, failed validation and bad NDJSON lines only fail their own entry."""
+    records = [RECORD, 'not a record', dict(RECORD, OCC_HOUR=30), dict(RECORD, OCC_DATE=None), [1, 2]]
+    body = client.post('/predict/batch', json=records).get_json()
+    assert body['total'] == 5 and body['failed'] == 4
+    errors = {result['index']: result.get('error') for result in body['results']}
+    assert errors == {0: None, 1: "Record must be a JSON object",
+                      2: "OCC_HOUR must be a number between 0 and 23",
+                      3: "Missing required field: OCC_DATE", 4: "Record must be a JSON object"}
+
+    lines = [json.dumps(RECORD), '{"BIKE_MAKE": ', '', json.dumps(RECORD)]
+    response = client.post('/predict/batch', data='\n'.join(lines), content_type='application/x-ndjson')
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['total'] == 3 and body['failed'] == 1
+    assert body['results'][1]['error'].startswith("Invalid JSON")
+    assert body['results'][0]['status'] == body['results'][2]['status']
+
+
+def test_batch_rejects_malformed_and_oversized_requests(client, monkeypatch):
+    """A body that is not a list of records is a 400, more than MAX_BATCH_RECORDS a 413."""
+    assert client.post('/predict/batch', json={'record': RECORD}).status_code == 400
+    assert client.post('/predict/batch', data='not json', content_type='application/json').status_code == 400
+
+    monkeypatch.setattr(app, 'MAX_BATCH_RECORDS', 2)
+    assert client.post('/predict/batch', json=[RECORD] * 2).status_code == 200
+    response = client.post('/predict/batch', json=[RECORD] * 3)
+    assert response.status_code == 413
+    assert 'limit of 2 records' in response.get_json()['error']
+    # NDJSON is refused on its line count, before any line is parsed
+    response = client.post('/predict/batch', data='\n'.join(['{'] * 3), content_type='application/x-ndjson')
+    assert response.status_code == 413
+
+    monkeypatch.setattr(app, 'MAX_BATCH_BYTES', 100)
+    response = client.post('/predict/batch', data='[' + ' ' * 200 + ']', content_type='application/json')
+    assert response.status_code == 413
+    assert 'limit of 100 bytes' in response.get_json()['error']
+
+
+def test_single_prediction_validates_like_the_batch(client):
+    """/predict rejects the records /predict/batch rejects, with the same messages."""
+    assert client.post('/predict', json=RECORD).status_code == 200
+    for record, error in [(dict(RECORD, OCC_DATE=None), "Missing required field: OCC_DATE"),
+                          (dict(RECORD, OCC_HOUR=None), "Missing required field: OCC_HOUR"),
+                          (dict(RECORD, OCC_DOY=400), "OCC_DOY must be a number between 1 and 366")]:
+        response = client.post('/predict', json=record)
+        assert response.status_code == 400
+        assert response.get_json()['error'] == error
+        assert client.post('/predict/batch', json=[record]).get_json()['results'][0]['error'] == error
+    assert client.post('/predict', json=[RECORD]).status_code == 400
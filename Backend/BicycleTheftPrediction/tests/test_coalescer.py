@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+from coalescer import MicroBatcher, PredictionTimeoutError, QueueFullError
+
+
+def submit_all(batcher, records):
+    """Submit records from concurrent threads, returning results (or exceptions) in input order."""
+    results = [None] * len(records)
+
+    def run(i):
+        try:
+            results[i] = batcher.submit(records[i], timeout=5)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(records))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_results_match_their_records_and_batches_flush_on_size():
+    """Every caller gets the result of its own record, batches never exceed max_batch_size."""
+    sizes = []
+
+    def score(records):
+        sizes.append(len(records))
+        return [record * 10 for record in records]
+
+    batcher = MicroBatcher(score, max_batch_size=4, max_wait_ms=50)
+    assert submit_all(batcher, list(range(20))) == [i * 10 for i in range(20)]
+    assert max(sizes) <= 4 and sum(sizes) == 20
+
+
+def test_lone_record_flushes_after_max_wait():
+    """A single request is scored once the wait window closes, not held for a full batch."""
+    batcher = MicroBatcher(lambda records: records, max_batch_size=64, max_wait_ms=20)
+    start = time.perf_counter()
+    assert batcher.submit('a', timeout=5) == 'a'
+    assert time.perf_counter() - start < 1.0
+
+
+def test_queue_full_raises():
+    """Submitting past max_queue_depth fails fast instead of blocking."""
+    release = threading.Event()
+
+    def score(records):
+        release.wait(5)
+        return records
+
+    batcher = MicroBatcher(score, max_batch_size=1, max_wait_ms=0, max_queue_depth=1)
+    first = threading.Thread(target=batcher.submit, args=('busy',))
+    first.start()
+    # Wait until the worker holds the first record, then fill the single queue slot
+    while batcher._queue.qsize():
+        time.sleep(0.001)
+    time.sleep(0.01)
+    second = threading.Thread(target=batcher.submit, args=('queued',))
+    second.start()
+    while not batcher._queue.qsize():
+        time.sleep(0.001)
+    with pytest.raises(QueueFullError):
+        batcher.submit('rejected')
+    release.set()
+    first.join()
+    second.join()
+
+
+def test_bad_record_only_fails_its_own_request():
+    """When the batch call raises, records are rescored alone and only the bad one errors."""
+    def score(records):
+        return [{'value': int(record)} for record in records]
+
+    batcher = MicroBatcher(score, max_batch_size=8, max_wait_ms=50)
+    results = submit_all(batcher, ['1', 'bad', '3'])
+    assert results[0] == {'value': 1} and results[2] == {'value': 3}
+    assert isinstance(results[1], ValueError)
+
+
+def test_stalled_worker_times_out_and_drops_abandoned_records():
+    """A caller gets PredictionTimeoutError instead of waiting forever; its record is never scored."""
+    release = threading.Event()
+    scored = []
+
+    def score(records):
+        scored.extend(records)
+        release.wait(5)
+        return records
+
+    batcher = MicroBatcher(score, max_batch_size=1, max_wait_ms=0, score_budget_ms=50)
+    assert batcher.stats()['timeout_ms'] == pytest.approx(50)
+    with pytest.raises(PredictionTimeoutError):
+        batcher.submit('stuck')
+    # Queued behind the stalled batch, so it times out before its own batch starts
+    with pytest.raises(PredictionTimeoutError):
+        batcher.submit('abandoned')
+    release.set()
+    assert batcher.submit('next', timeout=5) == 'next'
+    assert scored == ['stuck', 'next']
@@ -0,0 +1,87 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from analytics import ReturnRateStats
+from columnar import CURRENT_FILE, ColumnarWriter, read_columnar, read_schema, write_columnar
+
+
+def test_round_trip_across_chunks(tmp_path):
+    """Numeric, text and categorical columns read back as written, including missing values."""
+    path = str(tmp_path / 'cache.cols')
+    df = pd.DataFrame({
+        'year': np.array([2014, 2015, 2016, 2017], dtype='int16'),
+        'cost': [1.5, np.nan, 3.0, 0.0],
+        'status': pd.Categorical(['STOLEN', 'RECOVERED', None, 'STOLEN']),
+        'make': ['TREK', 'GI', 'TREK', None]
+    })
+    writer = ColumnarWriter(path, metadata={'source': 'test'})
+    writer.write(df.iloc[:2])
+    writer.write(df.iloc[2:])
+    writer.close()
+
+    assert read_schema(path)['metadata'] == {'source': 'test'}
+    result = read_columnar(path)
+    assert result['year'].dtype == np.int16
+    np.testing.assert_array_equal(result['year'], df['year'])
+    np.testing.assert_array_equal(result['cost'], df['cost'])
+    assert result['status'].astype(object).where(result['status'].notna(), None).tolist() == \
+        ['STOLEN', 'RECOVERED', None, 'STOLEN']
+    assert list(read_columnar(path, ['make'])['make'].astype(object).fillna('-')) == ['TREK', 'GI', 'TREK', '-']
+
+
+def test_rewrites_publish_atomically_without_clobbering(tmp_path):
+    """Concurrent writers each finish, and readers always see one complete version."""
+    path = str(tmp_path / 'cache.cols')
+    write_columnar(path, pd.DataFrame({'x': np.zeros(1000)}))
+    errors = []
+
+    def rewrite(value):
+        try:
+            for _ in range(10):
+                write_columnar(path, pd.DataFrame({'x': np.full(1000, value)}))
+        except Exception as e:
+            errors.append(e)
+
+    def read():
+        try:
+            for _ in range(50):
+                x = read_columnar(path)['x'].to_numpy()
+                assert len(x) == 1000 and (x == x[0]).all()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=rewrite, args=(v,)) for v in (1.0, 2.0)] + [threading.Thread(target=read)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert os.path.exists(os.path.join(path, CURRENT_FILE))
+    assert read_columnar(path)['x'].iloc[0] in (1.0, 2.0)
+
+
+def test_return_rates_match_direct_computation(tmp_path):
+    """ReturnRateStats gives the numbers of the original per-request pandas code, cached or not."""
+    rng = np.random.default_rng(0)
+    csv_path = tmp_path / 'thefts.csv'
+    pd.DataFrame({
+        'OCC_YEAR': np.where(rng.random(2000) < 0.02, np.nan, rng.integers(2010, 2024, 2000)),
+        'STATUS': rng.choice(['STOLEN', 'RECOVERED', 'UNKNOWN'], 2000, p=[0.9, 0.05, 0.05]),
+        'OTHER': 1
+    }).to_csv(csv_path, index=False)
+
+    df = pd.read_csv(csv_path)
+    df = df[df['OCC_YEAR'] >= 2014]
+    total_bikes = len(df)
+    recovered_bikes = len(df[df['STATUS'] == 'RECOVERED'])
+    yearly = df.groupby('OCC_YEAR')['STATUS'].apply(lambda x: (x == 'RECOVERED').mean() * 100).round(1)
+
+    for _ in range(2):  # builds the columnar cache, then reads it in a fresh instance
+        metrics = ReturnRateStats(str(csv_path), str(tmp_path / 'cache' / 'thefts.cols')).metrics()
+        assert metrics['total_bikes'] == total_bikes
+        assert metrics['total_recovered'] == recovered_bikes
+        assert metrics['return_rate'] == round(recovered_bikes / total_bikes * 100, 1)
+        assert metrics['yearly_return_rate'] == {int(year): float(rate) for year, rate in yearly.items()}
@@ -0,0 +1,17 @@
+import app
+
+
+def test_diagnostics_reports_memory_model_and_startup():
+    """/diagnostics shows this worker's memory, the model load state and startup timings."""
+    client = app.app.test_client()
+    body = client.get('/diagnostics').get_json()
+    assert set(body) == {'pid', 'memory', 'model', 'startup'}
+    assert body['memory']['peak_rss_mb'] > 0
+    assert 'loaded' in body['model']
+    assert set(body['startup']) == {'imports', 'lazy', 'app_import_seconds'}
+    assert {'options', 'analytics'} <= set(body['startup']['lazy'])
+
+    if app.model_store.available():
+        app.model_store.get()
+        model = client.get('/diagnostics').get_json()['model']
+        assert model['loaded'] and model['load_seconds'] >= 0
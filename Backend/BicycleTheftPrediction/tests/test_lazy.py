@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+import threading
+
+from lazy import LAZY_VALUES, Lazy
+
+
+def test_lazy_value_is_built_once_and_rebuilt_after_reset():
+    """Concurrent first calls share one build, reset() makes the next get() build again."""
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return len(calls)
+
+    value = Lazy('test_counter', factory)
+    assert not value.loaded and LAZY_VALUES['test_counter'] is value
+
+    threads = [threading.Thread(target=value.get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert value.get() == 1 and len(calls) == 1
+    assert value.load_seconds is not None
+
+    value.reset()
+    assert not value.loaded
+    assert value.get() == 2
+
+
+def test_serving_imports_stay_light():
+    """Importing the API, or the model class its pickles need, loads no plotting or xgboost."""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = ("import sys; import app, model; "
+            "print(sorted(m for m in ('matplotlib', 'xgboost', 'seaborn') if m in sys.modules))")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.join(base_dir, 'api'), os.path.join(base_dir, 'src')]))
+    out = subprocess.run([sys.executable, '-c', code], cwd=os.path.join(base_dir, 'api'), env=env,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == '[]'
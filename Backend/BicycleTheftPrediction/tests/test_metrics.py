@@ -0,0 +1,16 @@
+from metrics import MetricsRegistry
+
+
+def test_registry_renders_prometheus_text():
+    """Labelled counters and span histograms appear in the exposition format."""
+    registry = MetricsRegistry()
+    registry.counter('requests_total', 'Requests', endpoint='/predict', status=200).inc()
+    registry.counter('requests_total', 'Requests', endpoint='/predict', status=200).inc()
+    with registry.span('predict.preprocess'):
+        pass
+
+    text = registry.render()
+    assert '# TYPE requests_total counter' in text
+    assert 'requests_total{endpoint="/predict",status="200"} 2.0' in text
+    assert 'stage_duration_seconds_bucket{stage="predict.preprocess",le="+Inf"} 1' in text
+    assert 'stage_duration_seconds_count{stage="predict.preprocess"} 1' in text
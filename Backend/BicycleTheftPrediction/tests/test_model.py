@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from imblearn.over_sampling import SMOTE
+
+from model import MAX_CATEGORICAL_BINS, BicycleTheftModel, CachedSMOTE
+
+
+def test_categorical_mask_keeps_high_cardinality_columns_ordinal():
+    """Only categorical columns with fewer than MAX_CATEGORICAL_BINS codes are marked categorical."""
+    n = 2 * MAX_CATEGORICAL_BINS
+    X = pd.DataFrame({
+        'BIKE_MAKE': np.arange(n) % 1222,
+        'BIKE_MODEL': np.arange(n) * 20,
+        'BIKE_COLOUR': np.arange(n) % 284,
+        'BIKE_TYPE': np.arange(n) % 13,
+        'HOOD_140': np.arange(n) % 141,
+        'BIKE_COST': np.arange(n) * 1.5,
+    })
+    model = BicycleTheftModel('hist_gradient_boosting', handle_imbalance=False)
+    model.set_categorical_features(X)
+    mask = dict(zip(X.columns, model.base_model.get_params()['categorical_features']))
+    assert mask == {'BIKE_MAKE': False, 'BIKE_MODEL': False, 'BIKE_COLOUR': False,
+                    'BIKE_TYPE': True, 'HOOD_140': True, 'BIKE_COST': False}
+
+
+def test_cached_smote_matches_smote_and_sees_only_training_folds(monkeypatch):
+    """CachedSMOTE returns SMOTE's samples, resamples each training fold once and never a held-out fold."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({'BIKE_TYPE': rng.integers(0, 8, 600), 'BIKE_COST': rng.gamma(2.0, 600.0, 600)})
+    y = pd.Series((rng.random(600) < 0.15).astype(int))
+
+    expected_X, expected_y = SMOTE(random_state=42).fit_resample(X, y)
+    CachedSMOTE._cache.clear()
+    resampled_X, resampled_y = CachedSMOTE(random_state=42).fit_resample(X, y)
+    pd.testing.assert_frame_equal(resampled_X, expected_X)
+    pd.testing.assert_series_equal(resampled_y, expected_y)
+
+    calls = []
+    original = SMOTE.fit_resample
+
+    def recording(self, X, y, **params):
+        calls.append(set(X.index))
+        return original(self, X, y, **params)
+
+    monkeypatch.setattr(SMOTE, 'fit_resample', recording)
+    CachedSMOTE._cache.clear()
+    model = BicycleTheftModel('decision_tree')
+    X, y, splits = model.cv_splits(X, y, cv=3)
+    for _ in range(2):
+        for train_idx, test_idx in splits:
+            model.score_fold(X, y, train_idx, test_idx)
+    # Second pass over the folds is served from the cache
+    assert calls == [set(train_idx) for train_idx, _ in splits]
@@ -0,0 +1,20 @@
+from model_registry import ModelRegistry
+
+
+def test_publish_and_switch_live_version(tmp_path):
+    """Published versions hold their files and metrics, and LIVE moves between them."""
+    model_file = tmp_path / 'best_model.pkl'
+    model_file.write_bytes(b'model')
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    assert registry.live_version() is None
+
+    first = registry.publish({'best_model.pkl': str(model_file)}, {'f1_score': 0.5}, version='v1')
+    second = registry.publish({'best_model.pkl': str(model_file)}, version='v2', make_live=False)
+
+    assert registry.versions() == ['v1', 'v2']
+    assert registry.live_version() == first
+    assert registry.metrics(first) == {'f1_score': 0.5, 'model_version': 'v1'}
+    assert (tmp_path / 'registry' / 'v2' / 'best_model.pkl').read_bytes() == b'model'
+
+    registry.set_live(second)
+    assert registry.live_version() == 'v2'
@@ -0,0 +1,66 @@
+import joblib
+import numpy as np
+from sklearn.dummy import DummyClassifier
+from sklearn.ensemble import RandomForestClassifier
+
+from model_registry import ModelRegistry
+from model_store import ModelStore
+from tree_engine import TreeEnsemble
+
+
+def publish_constant_model(registry, tmp_path, version, recovered_share):
+    """Publish a model that always predicts the given recovered probability."""
+    y = (np.arange(100) < recovered_share * 100).astype(int)
+    model = DummyClassifier(strategy='prior').fit(np.zeros((100, 1)), y)
+    paths = {}
+    for name, obj in [('best_model.pkl', model), ('feature_order.pkl', ['x'])]:
+        paths[name] = str(tmp_path / f'{version}-{name}')
+        joblib.dump(obj, paths[name])
+    return registry.publish(paths, version=version)
+
+
+def test_workers_follow_the_live_version(tmp_path):
+    """get() picks up a LIVE switch made elsewhere, and request_reload() defers the load to get()."""
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    publish_constant_model(registry, tmp_path, 'v1', 0.2)
+    store = ModelStore(str(tmp_path), use_tree_engine=False, check_interval=0)
+    assert store.get()[0].predict_proba(np.zeros((1, 1)))[0, 1] == 0.2
+    assert store.version() == 'v1'
+
+    # Another process publishes and switches: the next get() serves it
+    publish_constant_model(registry, tmp_path, 'v2', 0.6)
+    assert store.get()[0].predict_proba(np.zeros((1, 1)))[0, 1] == 0.6
+    assert store.version() == 'v2'
+
+    # With checks off, only an explicit request reloads
+    store.check_interval = None
+    store.reload()
+    registry.set_live('v1')
+    assert store.get() and store.version() == 'v2'
+    store.request_reload()
+    assert store.version() == 'v2'
+    store.get()
+    assert store.version() == 'v1'
+
+
+def test_model_loads_lazily_or_on_warmup_and_is_memory_mapped(tmp_path):
+    """Nothing is loaded until get() or warmup(); the tree arrays are mapped, not copied."""
+    X = np.random.default_rng(0).normal(size=(200, 3))
+    y = (X[:, 0] > 0).astype(int)
+    forest = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    TreeEnsemble.from_model(forest).save(tmp_path / 'best_model_trees.pkl')
+    joblib.dump(forest, tmp_path / 'best_model.pkl')
+    joblib.dump(['a', 'b', 'c'], tmp_path / 'feature_order.pkl')
+
+    lazy = ModelStore(str(tmp_path), check_interval=None)
+    assert lazy.info() == {'loaded': False}
+    model, feature_order, vocabulary = lazy.get()
+    info = lazy.info()
+    assert info['loaded'] and info['engine'] == 'TreeEnsemble' and info['memory_mapped']
+    assert isinstance(model.threshold, np.memmap) and feature_order == ['a', 'b', 'c'] and vocabulary is None
+
+    warm = ModelStore(str(tmp_path), use_tree_engine=False, check_interval=None)
+    assert warm.warmup()
+    info = warm.info()
+    assert info['engine'] == 'RandomForestClassifier' and not info['memory_mapped']
+    assert set(info) == {'loaded', 'version', 'artifact', 'engine', 'memory_mapped', 'load_seconds'}
@@ -0,0 +1,28 @@
+import gzip
+import json
+
+from options_index import DYNAMIC_COMPRESSION, OptionsIndex, Payload
+
+
+def test_prefix_search_and_etags():
+    """Prefix queries are case-insensitive and sorted, payloads revalidate by any of their ETags."""
+    index = OptionsIndex({'BIKE_MAKE': ['TREK', 'GIANT', 'GI', 'TR', 'trek fx'] * 100, 'BIKE_SPEED': [21.0, 2.0]})
+
+    assert index.search('BIKE_MAKE', 'tr', limit=3) == ['TR', 'TR', 'TR']
+    assert set(index.search('BIKE_MAKE', 'TREK ', limit=500)) == {'trek fx'}
+    assert index.search('BIKE_MAKE', 'X') == []
+    assert index.search('BIKE_SPEED', '2') == [2.0, 21.0]
+
+    payload = index.payload
+    assert json.loads(gzip.decompress(payload.encodings['gzip'])) == index.options
+    assert payload.matches(payload.etags['gzip'])
+    assert payload.matches('"other", W/' + payload.etags['identity'])
+    assert not payload.matches('"other"')
+
+
+def test_dynamic_payloads_use_cheap_compression_with_the_same_body():
+    """Per-request payloads compress at the fastest level but decode to the same JSON and ETag."""
+    obj = {'BIKE_MODEL': [f'MODEL {i}' for i in range(500)]}
+    stored, dynamic = Payload(obj), Payload(obj, DYNAMIC_COMPRESSION)
+    assert gzip.decompress(dynamic.encodings['gzip']) == stored.body
+    assert dynamic.etags['identity'] == stored.etags['identity']
@@ -0,0 +1,65 @@
+import numpy as np
+
+from prediction_cache import PredictionCache
+
+
+class CountingModel:
+    def __init__(self):
+        self.rows_scored = 0
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=float)
+        self.rows_scored += len(X)
+        recovered = X[:, 0] / 10
+        return np.column_stack([1 - recovered, recovered])
+
+
+def test_cache_skips_scored_rows_and_resets_on_model_change():
+    """Repeated rows are served from the cache, a new model starts from an empty one."""
+    cache = PredictionCache(max_entries=2)
+    model = CountingModel()
+    X = np.array([[1.0, 0.0], [2.0, 0.0], [1.0, 0.0]])
+
+    np.testing.assert_allclose(cache.predict_proba(model, X), model.predict_proba(X))
+    model.rows_scored = 0
+    cache.predict_proba(model, X[:2])
+    assert model.rows_scored == 0
+    assert cache.stats()['size'] == 2
+
+    cache.predict_proba(model, np.array([[3.0, 0.0]]))
+    assert cache.stats()['evictions'] >= 1
+
+    other = CountingModel()
+    cache.predict_proba(other, X[:1])
+    assert other.rows_scored == 1
+    assert cache.stats()['clears'] == 1
+
+
+class ReloadingModel(CountingModel):
+    """Old model whose scoring overlaps a reload to new_model."""
+
+    def __init__(self, cache, new_model):
+        super().__init__()
+        self.cache, self.new_model = cache, new_model
+
+    def predict_proba(self, X):
+        self.cache.predict_proba(self.new_model, np.array([[9.0, 0.0]]))
+        return super().predict_proba(X) * 0 + [1.0, 0.0]
+
+
+def test_reload_during_scoring_does_not_cache_old_probabilities():
+    """Results of a replaced model are returned to their request but never served to the new model."""
+    cache = PredictionCache()
+    new_model = CountingModel()
+    old_model = ReloadingModel(cache, new_model)
+    X = np.array([[5.0, 0.0]])
+
+    np.testing.assert_allclose(cache.predict_proba(old_model, X), [[1.0, 0.0]])
+    np.testing.assert_allclose(cache.predict_proba(new_model, X), [[0.5, 0.5]])
+    clears = cache.stats()['clears']
+
+    # A request still holding the old model bypasses the cache instead of clearing it again
+    old_model.predict_proba = lambda rows: np.array([[1.0, 0.0]] * len(rows))
+    cache.predict_proba(old_model, X)
+    assert cache.stats()['clears'] == clears and cache.stats()['bypassed'] == 1
+    np.testing.assert_allclose(cache.predict_proba(new_model, X), [[0.5, 0.5]])
@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from columnar import ColumnarWriter, read_columnar, write_columnar
+from data_preprocessing import (UNKNOWN_CODE, FEATURE_SCHEMA, CSVSink, date_parts, fit_vocabulary,
+                                fit_vocabulary_chunked, iter_data_chunks, load_data, load_processed_features,
+                                preprocess_features, stream_features)
+
+RECORDS = [
+    {
+        "BIKE_MAKE": "TREK", "BIKE_MODEL": "FX3", "BIKE_TYPE": "RG", "BIKE_SPEED": 21,
+        "BIKE_COLOUR": "BLK", "BIKE_COST": 800, "PREMISES_TYPE": "House",
+        "LOCATION_TYPE": "Apartment (Rooming House, Condo)", "OCC_DATE": "2023-01-01",
+        "OCC_DOW": "Sunday", "OCC_HOUR": 14, "OCC_DOY": 1, "REPORT_DATE": "2023-01-02",
+        "HOOD_140": "080", "NEIGHBOURHOOD_140": "Palmerston-Little Italy (80)"
+    },
+    {
+        "BIKE_MAKE": "GIANT", "BIKE_MODEL": None, "BIKE_TYPE": "MT", "BIKE_SPEED": 18,
+        "BIKE_COLOUR": "RED", "BIKE_COST": 2500, "PREMISES_TYPE": "Outside",
+        "LOCATION_TYPE": "Streets, Roads, Highways (Bicycle Path, Private Road)",
+        "OCC_DATE": "2022-07-15", "OCC_DOW": "Friday", "OCC_HOUR": 23, "OCC_DOY": 196,
+        "REPORT_DATE": "2022-07-16", "HOOD_140": "077",
+        "NEIGHBOURHOOD_140": "Waterfront Communities-The Island (77)"
+    },
+]
+
+
+def test_vocabulary_matches_label_encoder():
+    """Encoding with a fitted vocabulary reproduces the LabelEncoder codes."""
+    df = pd.DataFrame(RECORDS)
+    vocabulary = fit_vocabulary(df)
+    pd.testing.assert_frame_equal(preprocess_features(df), preprocess_features(df, vocabulary))
+
+
+def test_single_row_matches_batch():
+    """A single record gets the same codes alone as inside a batch."""
+    df = pd.DataFrame(RECORDS)
+    vocabulary = fit_vocabulary(df)
+    batch = preprocess_features(df, vocabulary)
+    single = preprocess_features(df.iloc[[1]], vocabulary)
+    pd.testing.assert_frame_equal(single, batch.iloc[[1]])
+
+
+def test_unseen_category_gets_reserved_code():
+    """Categories missing from the vocabulary map to UNKNOWN_CODE."""
+    vocabulary = fit_vocabulary(pd.DataFrame(RECORDS))
+    record = dict(RECORDS[0], BIKE_MAKE="NOT A REAL MAKE")
+    X = preprocess_features(pd.DataFrame([record]), vocabulary)
+    assert X['BIKE_MAKE'].iloc[0] == UNKNOWN_CODE
+
+
+def test_processed_features_use_compact_dtypes(tmp_path):
+    """The schema loader assigns the declared dtypes and reads only requested columns."""
+    path = tmp_path / 'processed_features.csv'
+    preprocess_features(pd.DataFrame(RECORDS)).to_csv(path, index=False)
+
+    df = load_processed_features(path)
+    assert {col: str(dtype) for col, dtype in df.dtypes.items()} == FEATURE_SCHEMA
+
+    subset = load_processed_features(path, ['OCC_YEAR', 'SEASON'])
+    assert list(subset.columns) == ['OCC_YEAR', 'SEASON']
+
+
+def test_streaming_matches_whole_file(tmp_path):
+    """Chunked preprocessing fits the same vocabulary and writes the same features."""
+    raw = tmp_path / 'raw.csv'
+    pd.DataFrame(RECORDS * 3).to_csv(raw, index=False)
+
+    vocabulary = fit_vocabulary(load_data(raw))
+    assert fit_vocabulary_chunked(iter_data_chunks(raw, chunksize=2)) == vocabulary
+
+    output = tmp_path / 'features.csv'
+    # Left over by an interrupted run, must not end up in the new file
+    (tmp_path / 'features.csv.tmp').write_text('stale,header\n1,2\n')
+    assert stream_features(raw, CSVSink(str(output)), vocabulary, chunksize=2) == 6
+    expected = preprocess_features(load_data(raw), vocabulary)
+    pd.testing.assert_frame_equal(pd.read_csv(output), expected, check_dtype=False)
+
+
+
+def test_failed_stream_publishes_nothing(tmp_path):
+    """A chunk that cannot be stored aborts the sink: the old output stays, no partial files remain."""
+    raw = tmp_path / 'raw.csv'
+    pd.DataFrame(RECORDS * 2 + [dict(RECORDS[0], OCC_DATE=None)]).to_csv(raw, index=False)
+    vocabulary = fit_vocabulary(load_data(raw))
+    cache = str(tmp_path / 'features.cols')
+    write_columnar(cache, pd.DataFrame({'OCC_YEAR': np.array([2020], dtype='int16')}))
+    before = sorted(os.listdir(cache))
+
+    # The missing date leaves OCC_DAY missing, which int8 cannot hold
+    with pytest.raises(ValueError, match='OCC_DAY'):
+        stream_features(raw, ColumnarWriter(cache, dtypes=FEATURE_SCHEMA), vocabulary, chunksize=2)
+    assert sorted(os.listdir(cache)) == before
+    assert read_columnar(cache)['OCC_YEAR'].tolist() == [2020]
+
+    class FailingSink(CSVSink):
+        def write(self, df):
+            super().write(df)
+            raise OSError('disk full')
+
+    output = tmp_path / 'features.csv'
+    with pytest.raises(OSError):
+        stream_features(raw, FailingSink(str(output)), vocabulary, chunksize=2)
+    assert not os.path.exists(str(output) + '.tmp') and not output.exists()
+
+
+def test_calendar_lookup_matches_pandas():
+    """Dates inside and outside the calendar table get the same parts as pd.to_datetime."""
+    dates = pd.Series(['2023-01-01', '2016-02-29', '2014-01-01T05:00:00', '1985-03-04', '2050-12-31'])
+    parsed = pd.to_datetime(dates, format='ISO8601')
+    expected = np.column_stack([parsed.dt.year, parsed.dt.month, parsed.dt.day])
+    np.testing.assert_array_equal(date_parts(dates), expected)
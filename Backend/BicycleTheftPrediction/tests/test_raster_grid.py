@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from raster_grid import BOUNDARY, NeighbourhoodGrid
+from rtree_search import RTree
+
+# Toronto's bounding box, with some margin so points outside every neighbourhood are drawn too
+LAT_RANGE = (43.55, 43.89)
+LON_RANGE = (-79.67, -79.08)
+
+
+@pytest.fixture(scope='module')
+def engines():
+    exact = RTree(use_grid=False)
+    gridded = RTree(use_grid=False)
+    gridded.grid = NeighbourhoodGrid.build(exact, cell_size=250.0)
+    return exact, gridded
+
+
+def test_grid_matches_exact_search(engines):
+    """The grid answers like the polygon test for random points, including points in boundary cells."""
+    exact, gridded = engines
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(*LAT_RANGE, 3000)
+    lons = rng.uniform(*LON_RANGE, 3000)
+
+    xs, ys = exact.transformer.transform(lons, lats)
+    assert np.count_nonzero(gridded.grid.lookup_many(xs, ys) == BOUNDARY) > 50
+
+    expected = [exact.search(lat, lon) for lat, lon in zip(lats, lons)]
+    assert [gridded.search(lat, lon) for lat, lon in zip(lats, lons)] == expected
+    assert gridded.search_many(lats, lons) == expected
+    assert exact.search_many(lats, lons) == expected
+
+
+def test_non_finite_points_match_nothing(engines):
+    """NaN and infinite coordinates give ('NSA', 'NSA') with and without the grid."""
+    for engine in engines:
+        for lat, lon in [(float('nan'), -79.4), (43.7, float('inf')), (float('-inf'), float('nan'))]:
+            assert engine.search(lat, lon) == ('NSA', 'NSA')
+        assert engine.search_many([float('nan'), 43.7], [-79.4, float('inf')]) == [('NSA', 'NSA')] * 2
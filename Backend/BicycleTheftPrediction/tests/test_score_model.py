@@ -0,0 +1,36 @@
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.tree import DecisionTreeClassifier
+
+from data_preprocessing import fit_vocabulary, load_data, prepare_data_for_training, preprocess_features
+from score_model import score_file
+from test_preprocessing import RECORDS
+
+
+def test_scores_come_back_in_input_order(tmp_path):
+    """Scoring in small chunks on several workers writes one row per input row, in input order."""
+    rng = np.random.default_rng(0)
+    rows = [dict(RECORDS[i % 2], BIKE_COST=int(cost), OCC_HOUR=int(hour),
+                 STATUS='RECOVERED' if i % 4 == 0 else 'STOLEN')
+            for i, (cost, hour) in enumerate(zip(rng.integers(100, 5000, 103), rng.integers(0, 24, 103)))]
+    input_path = tmp_path / 'incidents.csv'
+    pd.DataFrame(rows).to_csv(input_path, index=False)
+
+    data = load_data(input_path)
+    vocabulary = fit_vocabulary(data)
+    X, y = prepare_data_for_training(data, vocabulary=vocabulary)
+    model = DecisionTreeClassifier(random_state=0).fit(X, y)
+    joblib.dump(model, tmp_path / 'best_model.pkl')
+    joblib.dump(list(X.columns), tmp_path / 'feature_order.pkl')
+    joblib.dump(vocabulary, tmp_path / 'category_vocabulary.pkl')
+
+    output_path = tmp_path / 'scores.csv'
+    assert score_file(str(input_path), str(output_path), str(tmp_path), n_workers=3, chunksize=10,
+                      use_tree_engine=False) == len(rows)
+
+    scores = pd.read_csv(output_path)
+    expected = model.predict_proba(preprocess_features(data, vocabulary)[list(X.columns)])
+    assert scores['ROW'].tolist() == list(range(len(rows)))
+    np.testing.assert_allclose(scores[[f'PROB_{label}' for label in model.classes_]], expected, atol=1e-6)
+    assert (scores['PREDICTION'] == model.classes_[expected.argmax(axis=1)]).all()
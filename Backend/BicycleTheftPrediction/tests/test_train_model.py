@@ -0,0 +1,40 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import train_model
+
+
+def make_dataset(n, seed=0):
+    """A small imbalanced problem with a label-encoded column, split into train and test."""
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        'BIKE_TYPE': rng.integers(0, 8, n),
+        'BIKE_COST': rng.gamma(2.0, 600.0, n),
+        'OCC_HOUR': rng.integers(0, 24, n),
+    })
+    y = ((X['BIKE_TYPE'] == 3) & (X['BIKE_COST'] > 800) | (rng.random(n) < 0.05)).astype(int)
+    split = int(n * 0.8)
+    return X[:split], X[split:], y[:split], y[split:]
+
+
+def test_parallel_training_matches_serial(monkeypatch):
+    """--jobs N produces the same fold scores and test results as training one model after another."""
+    monkeypatch.setattr(train_model, 'MODELS', {
+        name: train_model.MODELS[name] for name in ('decision_tree', 'hist_gradient_boosting')})
+    data = make_dataset(1000)
+
+    serial = train_model.train_and_evaluate_models(*data, n_workers=1)
+    start = time.time()
+    parallel = train_model.train_and_evaluate_models(*data, n_workers=2)
+    elapsed = time.time() - start
+    assert serial.keys() == parallel.keys()
+    for name in serial:
+        for metric, (mean, std) in serial[name]['cv_results'].items():
+            assert parallel[name]['cv_results'][metric] == (pytest.approx(mean), pytest.approx(std))
+        for metric in ('accuracy', 'precision', 'recall', 'f1'):
+            assert parallel[name]['test_results'][metric] == pytest.approx(serial[name]['test_results'][metric])
+        # Folds run side by side, so a model's wall time is its elapsed span, not the sum of its tasks
+        assert 0 < parallel[name]['timing']['wall'] <= elapsed
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+
+from model import BicycleTheftModel
+from tree_engine import TreeEnsemble
+
+
+@pytest.fixture(scope='module')
+def data():
+    X, y = make_classification(n_samples=600, n_features=12, weights=[0.85], random_state=0)
+    X[:, :3] = np.round(X[:, :3] * 10)  # integer-coded columns like the label encodings
+    return X, y
+
+
+@pytest.mark.parametrize('model_type', ['decision_tree', 'random_forest', 'gradient_boosting'])
+def test_probabilities_match_sklearn(data, model_type, tmp_path):
+    """The flattened ensemble reproduces sklearn's predict_proba."""
+    X, y = data
+    model = BicycleTheftModel(model_type=model_type)
+    if model_type == 'random_forest':
+        model.base_model.set_params(n_estimators=20)
+    model.fit(X, y)
+
+    path = tmp_path / 'trees.pkl'
+    TreeEnsemble.from_model(model).save(path)
+    ensemble = TreeEnsemble.load(path, mmap_mode='r')
+
+    np.testing.assert_allclose(ensemble.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(ensemble.predict(X), model.predict(X))
+    np.testing.assert_allclose(ensemble.predict_proba(X[:1]), model.predict_proba(X[:1]), rtol=0, atol=1e-12)
+
+
+def test_logistic_is_rejected(data):
+    """Models without trees cannot be exported."""
+    X, y = data
+    model = BicycleTheftModel(model_type='logistic', handle_imbalance=False).fit(X, y)
+    with pytest.raises(ValueError):
+        TreeEnsemble.from_model(model)
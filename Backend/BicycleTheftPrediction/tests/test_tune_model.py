@@ -0,0 +1,34 @@
+import os
+
+import pandas as pd
+
+import tune_model
+from test_preprocessing import RECORDS
+
+
+def write_raw_csv(path, n):
+    rows = [dict(RECORDS[i % 2], STATUS='RECOVERED' if i % 3 == 0 else 'STOLEN') for i in range(n)]
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def test_feature_cache_follows_csv_contents(tmp_path, monkeypatch):
+    """The cached features are reused for the same CSV and rebuilt once its contents change."""
+    data_path = tmp_path / 'thefts.csv'
+    cache_dir = tmp_path / 'cache'
+    write_raw_csv(data_path, 30)
+    X, y, vocabulary, key = tune_model.load_features_cached(str(data_path), str(cache_dir))
+    assert len(X) == len(y) == 30
+
+    loads = []
+    load_data = tune_model.load_data
+    monkeypatch.setattr(tune_model, 'load_data', lambda path: loads.append(path) or load_data(path))
+
+    cached_X, cached_y, _, cached_key = tune_model.load_features_cached(str(data_path), str(cache_dir))
+    assert loads == [] and cached_key == key
+    pd.testing.assert_frame_equal(cached_X, X)
+
+    write_raw_csv(data_path, 40)
+    new_X, _, _, new_key = tune_model.load_features_cached(str(data_path), str(cache_dir))
+    assert loads == [str(data_path)] and new_key != key
+    assert len(new_X) == 40
+    assert sorted(os.listdir(cache_dir)) == sorted([f'features_{key}.pkl', f'features_{new_key}.pkl'])